@@ -2,10 +2,237 @@ import streamlit as st
 import pandas as pd
 import json
 from datetime import datetime
-import io
-from utils import scrape_facebook_simplified, clean_excel_text, clean_text
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+import time
+from utils import dataset_fingerprint, iter_country_posts
+from jobs import JobManager, ACTIVE_STATUSES
+from cache import ResultCache
+from exports import write_excel, write_csv, write_archive, deferred_export, parquet_available, ARCHIVE_FORMATS
+from store import PostStore, collapse_duplicates
+from metrics import RunMetrics
+
+
+# -------------------------------
+# Artefacts dérivés mis en cache par empreinte du jeu de données
+# -------------------------------
+# Les paramètres préfixés par "_" ne sont pas hachés par Streamlit : seule
+# l'empreinte, calculée une fois après le scraping, sert de clé de cache.
+CACHE_TTL = 60 * 60
+CACHE_MAX_ENTRIES = 32
+
+# Tableau des résultats : lignes par page, longueur des aperçus de texte et colonnes de tri
+RESULTS_PAGE_SIZES = [25, 50, 100]
+PREVIEW_LENGTH = 200
+SORT_COLUMNS = ["Date de création", "Acteur", "Pays", "Type", "Sentiment", "Reprises"]
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def prepare_results(fingerprint: str, _data: pd.DataFrame, collapse: bool = False) -> pd.DataFrame:
+    """Construit le tableau de résultats affiché et exporté (un post par groupe de reprises si collapse)."""
+    data = collapse_duplicates(_data) if collapse else _data
+    df = data.drop(columns="Groupe", errors="ignore").rename(columns={"Nom de la page": "Acteur"})
+    df["Jour"] = df['Date de création'].dt.day.astype("Int8")
+    df["Mois"] = df['Date de création'].dt.month.astype("Int8")
+    df["Année"] = df['Date de création'].dt.year.astype("Int16")
+
+    # Type et titre issus de la classification automatique (vides pour des résultats
+    # sans classification), puis colonnes fixes en catégories : une seule valeur stockée
+    for col in ("Type", "Titre"):
+        values = df.pop(col) if col in df.columns else pd.Categorical([""] * len(df))
+        df.insert(df.columns.get_loc("Texte du post"), col, values)
+    df.insert(df.columns.get_loc("URL du post"), "Plateforme", pd.Categorical(["web"] * len(df)))
+    df.insert(df.columns.get_loc("URL du post"), "Nom plateforme", pd.Categorical(["facebook"] * len(df)))
+    df["Date de création"] = df.pop("Date de création")
+    if "Sentiment" in df.columns:
+        df["Sentiment"] = df.pop("Sentiment")
+    # URL brute : les liens cliquables ne sont générés qu'à l'export Excel
+    df.rename(columns={"URL du post": "Lien"}, inplace=True)
+    return df
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def sorted_positions(fingerprint: str, collapse: bool, column: str, descending: bool, _df: pd.DataFrame):
+    """Ordre des lignes du tableau de résultats pour un tri donné (positions, calculées une fois par tri)."""
+    order = _df[column].sort_values(ascending=not descending, kind="stable", na_position="last")
+    return _df.index.get_indexer(order.index)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def wordcloud_image(frequencies: dict):
+    """Génère l'image du nuage de mots à partir de l'index de fréquences."""
+    if not frequencies:
+        return None
+    # Import tardif : wordcloud (et matplotlib) ne sont chargés qu'à l'affichage des résultats
+    from wordcloud import WordCloud
+    wordcloud = WordCloud(width=800, height=400, background_color='white', colormap='viridis')
+    return wordcloud.generate_from_frequencies(frequencies).to_array()
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Cache des résultats de scraping, partagé par toutes les sessions du serveur."""
+    return ResultCache()
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """Gestionnaire de scrapings en arrière-plan, partagé par toutes les sessions du serveur."""
+    return JobManager(PostStore(), get_result_cache())
+
+
+@st.fragment(run_every=2)
+def job_status_panel(job_id: str):
+    """Suit un scraping en arrière-plan et charge ses résultats dès qu'il est terminé."""
+    manager = get_job_manager()
+    job = manager.status(job_id)
+
+    if job is not None and job["status"] in ACTIVE_STATUSES:
+        st.info(f"⏳ Scraping en cours... {job['message'] or ''}")
+        return
+
+    st.session_state['loaded_job'] = job_id
+    if job is None:
+        st.session_state['job_error'] = "⚠️ Scraping introuvable"
+    elif job["status"] == "done":
+        data = manager.result(job_id)
+        urls = [url for _, group_urls in job["params"]["groups"] for url in group_urls]
+        if data is not None and not data.empty:
+            store_results(data, manager.store.page_ids_for_urls(urls), job_id)
+        else:
+            st.session_state['job_error'] = "⚠️ Aucun post récupéré"
+    else:
+        st.session_state['job_error'] = job["message"] or "❌ Le scraping a échoué"
+    st.rerun()
+
+
+def follow_job(job_id: str):
+    """Associe un scraping à la session ; son identifiant est gardé dans l'URL pour survivre à un rafraîchissement."""
+    st.session_state['job_id'] = job_id
+    st.session_state.pop('loaded_job', None)
+    st.query_params["job"] = job_id
+
+
+def store_results(data: pd.DataFrame, page_ids: list, job_id: str = None):
+    """Enregistre les résultats d'un scraping dans la session avec leur empreinte."""
+    st.session_state['scraped_data'] = data
+    st.session_state['page_ids'] = page_ids
+    st.session_state['results_job'] = job_id
+    st.session_state['data_fingerprint'] = dataset_fingerprint(data)
+    st.session_state['scraping_done'] = True
+
+
+def turn_page(step: int):
+    """Change de page dans le tableau des résultats (appelé avant la réexécution du fragment)."""
+    st.session_state['results_page'] = st.session_state.get('results_page', 1) + step
+
+
+@st.fragment
+def results_table(fingerprint: str, collapse: bool, df: pd.DataFrame):
+    """
+    Tableau des résultats paginé côté serveur.
+
+    Filtre, tri et découpage sont faits ici : seule la page affichée, avec un
+    aperçu tronqué des textes, est envoyée au navigateur. Le texte complet
+    d'un post est affiché à la demande, en sélectionnant sa ligne. Fragment :
+    changer de page ne relance pas le reste de la page (analyses, exports).
+    """
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        search = st.text_input("Filtrer", placeholder="Texte ou acteur", key="results_search")
+    with col2:
+        sort_column = st.selectbox("Trier par", [col for col in SORT_COLUMNS if col in df.columns], key="results_sort")
+    with col3:
+        descending = st.radio("Ordre", ["Décroissant", "Croissant"], horizontal=True, key="results_order") == "Décroissant"
+    with col4:
+        page_size = st.selectbox("Lignes", RESULTS_PAGE_SIZES, key="results_page_size")
+
+    positions = sorted_positions(fingerprint, collapse, sort_column, descending, df)
+    if search:
+        matches = (
+            df["Texte du post"].str.contains(search, case=False, regex=False, na=False)
+            | df["Acteur"].astype("string").str.contains(search, case=False, regex=False, na=False)
+        ).to_numpy()
+        positions = positions[matches[positions]]
+
+    # Retour à la première page quand le jeu de données, le filtre ou le tri changent
+    view_key = (fingerprint, collapse, search, sort_column, descending, page_size)
+    if st.session_state.get('results_view') != view_key:
+        st.session_state['results_view'] = view_key
+        st.session_state['results_page'] = 1
+    n_pages = max((len(positions) - 1) // page_size + 1, 1)
+    st.session_state['results_page'] = min(st.session_state.get('results_page', 1), n_pages)
+
+    page = st.session_state['results_page']
+    window = df.iloc[positions[(page - 1) * page_size:page * page_size]]
+    texts = window["Texte du post"]
+    display = window.drop(columns="Texte du post")
+    display.insert(
+        window.columns.get_loc("Texte du post"), "Aperçu du texte",
+        texts.where(texts.str.len() <= PREVIEW_LENGTH, texts.str.slice(0, PREVIEW_LENGTH - 1) + "…")
+    )
+
+    if positions.size == 0:
+        st.info("Aucun post ne correspond à ce filtre")
+        return
+    event = st.dataframe(
+        display,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="results_table",
+        column_config={
+            "Lien": st.column_config.LinkColumn("Lien"),
+            "Date de création": st.column_config.DateColumn("Date de création", format="DD/MM/YYYY")
+        }
+    )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Précédente", disabled=page <= 1, key="results_previous", on_click=turn_page, args=(-1,))
+    with col2:
+        st.caption(
+            f"Posts {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(window)} sur {positions.size} "
+            f"· page {page} / {n_pages}"
+        )
+    with col3:
+        st.button("Suivante ➡️", disabled=page >= n_pages, key="results_next", on_click=turn_page, args=(1,))
+
+    # Texte complet du post sélectionné, chargé à la demande
+    selected = event.selection.rows if event is not None else []
+    if selected and selected[0] < len(window):
+        post = window.iloc[selected[0]]
+        with st.container(border=True):
+            created = post['Date de création']
+            st.markdown(f"**{post['Acteur']}**" + (f" · {created:%d/%m/%Y}" if pd.notna(created) else ""))
+            st.text(post["Texte du post"])
+            if isinstance(post["Lien"], str) and post["Lien"].startswith("http"):
+                st.markdown(f"[Voir le post]({post['Lien']})")
+    else:
+        st.caption("Sélectionnez une ligne pour afficher le texte complet du post")
+
+
+def diagnostics_panel(job_id: str, app_metrics: RunMetrics):
+    """Affiche les mesures par étape du scraping et de l'affichage des résultats."""
+    with st.expander("🩺 Diagnostics", expanded=True):
+        job_metrics = get_job_manager().metrics(job_id) if job_id else None
+        if job_metrics is None:
+            st.caption("Aucune mesure de scraping en mémoire pour ces résultats (chargement local ou serveur redémarré)")
+        else:
+            frame = job_metrics.to_frame()
+            actor_runs = frame[frame["stage"].str.endswith("_actor")]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Runs Apify", len(actor_runs), f"{actor_runs['seconds'].sum():.1f} s cumulées" if len(actor_runs) else None)
+            with col2:
+                compute_units = actor_runs["compute_units"].sum() if "compute_units" in actor_runs else 0
+                st.metric("Unités de calcul Apify", f"{compute_units:.3f}")
+            with col3:
+                received = actor_runs["bytes"].sum() if "bytes" in actor_runs else 0
+                st.metric("Données reçues", f"{received / 1024 / 1024:.1f} Mo")
+            st.dataframe(frame, use_container_width=True, hide_index=True)
+
+        st.markdown("**Affichage des résultats**")
+        st.dataframe(app_metrics.to_frame(), use_container_width=True, hide_index=True)
 
 
 def main():
@@ -31,6 +258,41 @@ def main():
             value=7,
             help="Nombre de jours en arrière pour récupérer les posts"
         )
+
+        incremental = st.checkbox(
+            "Scraping incrémental",
+            value=True,
+            help="Ne récupère que les posts plus récents que ceux déjà stockés localement"
+        )
+
+        refresh_pages = st.checkbox(
+            "Actualiser les informations des pages",
+            value=False,
+            help="Ignore le cache local des pages et relance l'actor page-info pour toutes les URLs"
+        )
+
+        use_cache = st.checkbox(
+            "Utiliser le cache des résultats",
+            value=True,
+            help="Une demande identique (mêmes pages, même période) de moins d'une heure est servie sans relancer les actors "
+                 "(sauf en scraping complet, non incrémental)"
+        )
+        if st.button("🗑 Vider le cache des résultats"):
+            get_result_cache().invalidate()
+            st.toast("Cache des résultats vidé")
+
+        collapse = st.checkbox(
+            "Regrouper les reprises",
+            value=False,
+            help="Compte une seule fois les posts au contenu identique ou quasi identique "
+                 "(campagnes reprises par plusieurs pages) dans les statistiques et les exports"
+        )
+
+        show_diagnostics = st.checkbox(
+            "🩺 Afficher les diagnostics",
+            value=False,
+            help="Durées, volumes et coûts Apify de chaque étape du scraping et de l'affichage"
+        )
         
         st.markdown("---")
         st.markdown("### 📌 Instructions")
@@ -47,17 +309,35 @@ def main():
         # Zone principale
         st.header("🔗 Pays disponibles")
         
+        # Mode multi-pays : tous les pays sont scrapés en parallèle
+        all_countries = st.checkbox("🌍 Tous les pays", value=False)
+        
         # Sélecteur de pays
         selected_country = st.radio(
         "Sélectionnez le pays",
         options=list(countries_data.keys()),
-        horizontal=False
+        horizontal=False,
+        disabled=all_countries
         )
         
-        # Récupérer les données du pays sélectionné
-        country_data = countries_data.get(selected_country, {})
-        facebook_urls = list(country_data.values())
-        facebook_names = list(country_data.keys())
+        # Récupérer les données du ou des pays sélectionnés
+        if all_countries:
+            selected_countries = {
+                country: list(pages.values()) for country, pages in countries_data.items()
+            }
+            max_concurrency = st.slider(
+                "Runs Apify simultanés",
+                min_value=1,
+                max_value=12,
+                value=6,
+                help="Nombre maximal de runs d'actors lancés en même temps"
+            )
+        else:
+            selected_countries = {selected_country: list(countries_data.get(selected_country, {}).values())}
+        facebook_urls = [url for urls in selected_countries.values() for url in urls]
+        facebook_names = [
+            name for country in selected_countries for name in countries_data.get(country, {}).keys()
+        ]
 
         
     
@@ -68,42 +348,102 @@ def main():
             for i, (name, url) in enumerate(zip(facebook_names, facebook_urls), 1):
                 st.write(f"{i}. **{name}** - {url}")
     
-    # Bouton de lancement
-    if st.button("🚀 Lancer le scraping", type="primary", disabled=not api_token or not facebook_urls):
+    # Boutons de lancement
+    col1, col2 = st.columns(2)
+    with col1:
+        launch = st.button("🚀 Lancer le scraping", type="primary", disabled=not api_token or not facebook_urls)
+    with col2:
+        load_local = st.button("📂 Charger depuis le stockage local", disabled=not facebook_urls)
+
+    if load_local:
+        store = PostStore()
+        since_ts = int(time.time()) - days * 24 * 60 * 60
+        page_ids = store.page_ids_for_urls(facebook_urls)
+        data = store.load_posts(page_ids, since_ts)
+        if not data.empty:
+            store_results(data, page_ids)
+        else:
+            st.warning("⚠️ Aucun post stocké localement pour ces pages")
+
+    if launch:
         if not api_token:
             st.warning("⚠️ Veuillez entrer votre token API Apify")
         elif not facebook_urls:
             st.warning("⚠️ Veuillez ajouter au moins une URL Facebook")
         else:
-            with st.spinner("Scraping en cours... Cela peut prendre quelques minutes ⏳"):
-                data = scrape_facebook_simplified(api_token, facebook_urls, days)
-                
-                if data:
-                    # Stocker les données dans la session
-                    st.session_state['scraped_data'] = data
-                    st.session_state['scraping_done'] = True
+            # Le scraping tourne en arrière-plan : la session reste utilisable
+            job_id = get_job_manager().submit(
+                api_token,
+                selected_countries if all_countries else {None: facebook_urls},
+                days,
+                incremental=incremental,
+                refresh_pages=refresh_pages,
+                max_concurrency=max_concurrency if all_countries else 4,
+                use_cache=use_cache
+            )
+            follow_job(job_id)
+
+    # Suivi du scraping en cours (y compris après un rafraîchissement de la page)
+    job_id = st.session_state.get('job_id') or st.query_params.get("job")
+    if job_id and st.session_state.get('loaded_job') != job_id:
+        job_status_panel(job_id)
+    if 'job_error' in st.session_state:
+        st.error(st.session_state.pop('job_error'))
+
+    with st.expander("🗂 Scrapings récents"):
+        for job in get_job_manager().recent(limit=10):
+            groups = [country or "Pages sélectionnées" for country, _ in job["params"]["groups"]]
+            created = datetime.fromtimestamp(job["created_at"]).strftime("%d/%m %H:%M")
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(
+                    f"**{created}** · {', '.join(groups)} · {job['params']['days']} j · "
+                    f"{job['status']}" + (f" · {job['n_posts']} posts" if job['n_posts'] is not None else "")
+                )
+            with col2:
+                if job["status"] == "done" and st.button("Charger", key=f"job_{job['job_id']}"):
+                    follow_job(job["job_id"])
+                    st.rerun()
+
+    with st.expander("📦 Archive du stockage local"):
+        st.caption(
+            "Exporte les posts stockés des pays sélectionnés sans relancer les actors. "
+            "Le fichier est généré par lots au moment du téléchargement."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            archive_days = st.number_input("Nombre de jours à exporter", min_value=1, max_value=3650, value=90)
+        with col2:
+            formats = {"CSV compressé (.csv.gz)": "csv.gz"}
+            if parquet_available():
+                formats["Parquet (.parquet)"] = "parquet"
+            archive_fmt = formats[st.radio("Format", list(formats), horizontal=True)]
+        archive_countries = dict(selected_countries)
+        st.download_button(
+            label="📥 Télécharger l'archive",
+            data=deferred_export(
+                lambda output: write_archive(
+                    iter_country_posts(PostStore(), archive_countries, archive_days), output, archive_fmt
+                ),
+                stage=f"archive_{archive_fmt}"
+            ),
+            file_name=f"facebook_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{archive_fmt}",
+            mime=ARCHIVE_FORMATS[archive_fmt][1],
+            on_click="ignore",
+            disabled=not facebook_urls
+        )
     
     # Affichage des résultats
     if st.session_state.get('scraping_done', False) and 'scraped_data' in st.session_state:
         st.markdown("---")
         st.header("📊 Résultats")
         
-        data = st.session_state['scraped_data']
-        df = pd.DataFrame(data)
-        df['Date de création'] = pd.to_datetime(df['Date de création'], errors='coerce')
-        df.rename(columns={"Nom de la page": "Acteur"}, inplace=True)
-        df["Jour"] = df['Date de création'].dt.day
-        df["Mois"] = df['Date de création'].dt.month
-        df["Année"] = df['Date de création'].dt.year
-
-        # Colonnes à ajouter (vides)
-        df.insert(df.columns.get_loc("Texte du post"), "Type", "")
-        df.insert(df.columns.get_loc("Texte du post"), "Titre", "")
-        df.insert(df.columns.get_loc("URL du post"), "Plateforme", "web")
-        df.insert(df.columns.get_loc("URL du post"), "Nom plateforme", "facebook")
-        df["Date de création"] = df.pop("Date de création")
-        df['URL du post'] = df['URL du post'].apply(lambda x: f'=HYPERLINK("{x}", "{x}")')
-        df.rename(columns={"URL du post": "Lien"}, inplace=True)
+        fingerprint = st.session_state['data_fingerprint']
+        results_job = st.session_state.get('results_job')
+        app_metrics = RunMetrics(results_job)
+        with app_metrics.stage("prepare_results") as stage:
+            df = prepare_results(fingerprint, st.session_state['scraped_data'], collapse)
+            stage["items"] = len(df)
         
         # Statistiques
         col1, col2, col3 = st.columns(3)
@@ -119,21 +459,26 @@ def main():
 
 
         # -------------------------------
-        # Analyse des posts et nuage de mots
+        # Analyse des posts : index de mots, hashtags et mentions du stockage local
         # -------------------------------
+        analytics_start = time.perf_counter()
+        store = PostStore()
+        page_ids = st.session_state.get('page_ids', [])
+        page_names = store.page_names(page_ids)
+        actor = st.selectbox(
+            "Acteur analysé",
+            options=["Tous les acteurs", *sorted(set(page_names.values()) - {None})]
+        )
+        if actor != "Tous les acteurs":
+            page_ids = [page_id for page_id, name in page_names.items() if name == actor]
 
-        # Nettoyage complet du texte
-        all_text = " ".join(df['Texte du post'].apply(clean_text))
-
-        # Génération du nuage de mots
-        wordcloud = WordCloud(width=800, height=400, background_color='white', colormap='viridis').generate(all_text)
-
-        # Comptage des posts par acteur
-        posts_per_actor = df.groupby('Acteur')['Lien'].count().sort_values(ascending=False)
+        # Période couverte par les résultats
+        dates = df['Date de création'].dropna()
+        since_day = dates.min().strftime("%Y-%m-%d") if not dates.empty else None
+        until_day = dates.max().strftime("%Y-%m-%d") if not dates.empty else None
 
-        # Extraction des hashtags
-        hashtags = df['Texte du post'].str.findall(r'#\w+').explode()
-        hashtags_count = hashtags.value_counts()
+        top_hashtags = store.top_tags(page_ids, "hashtag", since_day, until_day, limit=10, unique=collapse)
+        top_hashtags.index = "#" + top_hashtags.index
 
         # -------------------------------
         # Affichage Streamlit dans deux colonnes
@@ -142,22 +487,46 @@ def main():
 
         with col1:
             st.subheader("🏷 Top 10 hashtags")
-            st.bar_chart(hashtags_count.head(10))
+            st.bar_chart(top_hashtags)
 
         with col2:
             st.subheader("📝 Nuage de mots des publications")
-            fig, ax = plt.subplots(figsize=(8,4))
-            ax.imshow(wordcloud, interpolation='bilinear')
-            ax.axis('off')
-            st.pyplot(fig)
+            frequencies = store.term_frequencies(page_ids, since_day, until_day, unique=collapse)
+            with app_metrics.stage("nuage_de_mots", items=len(frequencies)):
+                wordcloud = wordcloud_image(frequencies)
+            if wordcloud is not None:
+                st.image(wordcloud, use_container_width=True)
 
+        col1, col2 = st.columns(2)
 
+        with col1:
+            st.subheader("📈 Tendance des 5 principaux hashtags")
+            trend = store.tag_trend(
+                page_ids, top_hashtags.index.str[1:][:5], "hashtag", since_day, until_day, unique=collapse
+            )
+            if not trend.empty:
+                trend.columns = "#" + trend.columns
+                st.line_chart(trend.resample("W").sum() if len(trend) > 31 else trend)
 
+        with col2:
+            st.subheader("👥 Top 10 mentions")
+            top_mentions = store.top_tags(page_ids, "mention", since_day, until_day, limit=10, unique=collapse)
+            top_mentions.index = "@" + top_mentions.index
+            st.bar_chart(top_mentions)
 
+        with st.expander("🏷 Principaux hashtags par acteur"):
+            by_actor = store.tags_by_page(page_ids, "hashtag", since_day, until_day, unique=collapse)
+            by_actor = pd.DataFrame({
+                "Acteur": by_actor["page_id"].map(page_names),
+                "Hashtag": "#" + by_actor["tag"],
+                "Occurrences": by_actor["n"]
+            })
+            st.dataframe(by_actor.groupby("Acteur").head(5), use_container_width=True, hide_index=True)
+        app_metrics.add({"stage": "analyses", "seconds": time.perf_counter() - analytics_start})
 
         # Afficher le tableau
         st.subheader("📋 Aperçu des données")
-        st.dataframe(df, use_container_width=True, height=400)
+        results_table(fingerprint, collapse, df)
         
         # Boutons d'export
         st.subheader("💾 Exporter les données")
@@ -165,47 +534,47 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            # Export Excel
-            output = io.BytesIO()
-            # Nettoyage des caractères illégaux
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].apply(clean_excel_text)
-
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Posts Facebook')
-                
-                # Ajuster la largeur des colonnes
-                worksheet = writer.sheets['Posts Facebook']
-                for idx, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).apply(len).max(),
-                        len(col)
-                    )
-                    worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-            
-            excel_data = output.getvalue()
-            
+            # Export Excel (liens cliquables), généré au clic
             st.download_button(
                 label="📥 Télécharger Excel",
-                data=excel_data,
+                data=deferred_export(
+                    lambda output: write_excel(df, output, 'Posts Facebook', link_columns=["Lien"]),
+                    stage="export_excel", run_id=results_job, items=len(df)
+                ),
                 file_name=f"facebook_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore"
             )
         
         with col2:
-            # Export CSV
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
+            # Export CSV, généré au clic
             st.download_button(
                 label="📥 Télécharger CSV",
-                data=csv,
+                data=deferred_export(
+                    lambda output: write_csv([df], output),
+                    stage="export_csv", run_id=results_job, items=len(df)
+                ),
                 file_name=f"facebook_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"
             )
         
+        # Les mesures d'affichage sont journalisées au premier rendu de chaque jeu de données,
+        # les suivants étant servis par les caches
+        if st.session_state.get('metrics_logged') != fingerprint:
+            app_metrics.write()
+            st.session_state['metrics_logged'] = fingerprint
+        if show_diagnostics:
+            diagnostics_panel(results_job, app_metrics)
+
         # Option pour réinitialiser
         if st.button("🔄 Nouveau scraping"):
             st.session_state['scraping_done'] = False
             st.session_state.pop('scraped_data', None)
+            st.session_state.pop('data_fingerprint', None)
+            st.session_state.pop('page_ids', None)
+            st.session_state.pop('job_id', None)
+            st.query_params.pop("job", None)
             st.rerun()
 
 
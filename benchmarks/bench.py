@@ -0,0 +1,186 @@
+"""
+Benchmarks des chemins critiques de la veille, sans appel à Apify.
+
+Chaque étape est mesurée (temps écoulé et pic de mémoire Python) pour
+plusieurs tailles de données "pages x posts par page" :
+
+    python -m benchmarks.bench
+    python -m benchmarks.bench --sizes 10x100 50x500 --latency 0.05
+    python -m benchmarks.bench --output bench_output.txt
+
+Le scraping passe par un client Apify local (benchmarks.fake_apify) qui
+sert des datasets synthétiques : textes en français avec hashtags et
+mentions, dates mélangeant timestamps et format textuel de l'actor.
+"""
+import argparse
+import gc
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+import utils
+from benchmarks.fake_apify import FakeApifyClientAsync, synthetic_posts
+from classify import classify_texts
+from exports import to_excel_bytes, write_csv, write_archive, parquet_available
+from store import PostStore
+
+
+# Tailles mesurées par défaut : pages x posts par page
+DEFAULT_SIZES = ["5x100", "20x250", "50x400"]
+
+logger = logging.getLogger("benchmarks")
+
+
+def parse_size(size: str) -> tuple:
+    """Interprète une taille "pages x posts", ex: "20x250" -> (20, 250)."""
+    try:
+        pages, posts = (int(part) for part in size.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Taille invalide : {size} (attendu : PAGESxPOSTS)")
+    return pages, posts
+
+
+def measure(stage: str, func, *args, **kwargs):
+    """
+    Exécute une étape en mesurant son temps écoulé et son pic de mémoire.
+
+    Returns:
+        tuple: (résultat de l'étape, dictionnaire de mesures)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, {"étape": stage, "secondes": elapsed, "pic_mo": peak / 1024 / 1024}
+
+
+@contextmanager
+def fake_apify(posts_per_page: int, latency: float):
+    """Remplace le client Apify de utils par le client local le temps du benchmark."""
+    clients = []
+
+    def factory(token=None):
+        client = FakeApifyClientAsync(token, posts_per_page=posts_per_page, latency=latency)
+        clients.append(client)
+        return client
+
+    original = utils.ApifyClientAsync
+    utils.ApifyClientAsync = factory
+    try:
+        yield clients
+    finally:
+        utils.ApifyClientAsync = original
+
+
+def bench_size(n_pages: int, posts_per_page: int, days: int, latency: float, workdir: str) -> list:
+    """Mesure toutes les étapes pour une taille de données."""
+    # Import tardif : app importe Streamlit et WordCloud. Hors de `streamlit run`,
+    # chaque cache de app signale l'absence de runtime : inutile ici.
+    import streamlit.logger
+    streamlit.logger.set_log_level("error")
+    import app
+    from wordcloud import WordCloud
+
+    urls = [f"https://www.facebook.com/page{i}" for i in range(n_pages)]
+    store = PostStore(os.path.join(workdir, f"bench_{n_pages}x{posts_per_page}.db"))
+    results = []
+
+    # 1. Runs des actors, normalisation, stockage et indexation (pipeline complet)
+    with fake_apify(posts_per_page, latency) as clients:
+        data, row = measure(
+            "scraping complet (client local)", utils.scrape_facebook_simplified,
+            "bench", urls, days=days, incremental=False, store=store, progress=lambda *_: None
+        )
+    row["requêtes_api"] = sum(client.requests for client in clients)
+    results.append(row)
+
+    # 2. Étapes isolées sur les mêmes volumes
+    now = int(time.time())
+    raw_posts = [
+        post
+        for i in range(n_pages)
+        for post in synthetic_posts(str(i), posts_per_page, now, now - days * 24 * 60 * 60)
+    ]
+    page_names = {str(i): f"Page {i}" for i in range(n_pages)}
+    posts, row = measure("normalize_posts", utils.normalize_posts, raw_posts, page_names)
+    results.append(row)
+
+    _, row = measure("clean_texts", utils.clean_texts, posts["text"])
+    results.append(row)
+
+    _, row = measure("term_counts + tag_counts", lambda: (utils.term_counts(posts), utils.tag_counts(posts)))
+    results.append(row)
+
+    _, row = measure("classification", classify_texts, posts["text"])
+    results.append(row)
+
+    frequencies = store.term_frequencies(store.page_ids_for_urls(urls))
+    wordcloud = WordCloud(width=800, height=400, background_color='white', colormap='viridis')
+    _, row = measure("nuage de mots", lambda: wordcloud.generate_from_frequencies(frequencies).to_array())
+    results.append(row)
+
+    df, row = measure("prepare_results", app.prepare_results.__wrapped__, "bench", data)
+    results.append(row)
+
+    _, row = measure("export Excel", to_excel_bytes, df, link_columns=["Lien"])
+    results.append(row)
+
+    _, row = measure("export CSV", write_csv, [df], io.BytesIO())
+    results.append(row)
+
+    # 3. Archives du stockage local, relu par lots
+    for fmt in ["csv.gz", "parquet"] if parquet_available() else ["csv.gz"]:
+        _, row = measure(
+            f"archive {fmt}", lambda: write_archive(utils.iter_country_posts(store, {None: urls}, days), io.BytesIO(), fmt)
+        )
+        results.append(row)
+
+    for row in results:
+        row["taille"] = f"{n_pages}x{posts_per_page}"
+        row["posts"] = len(data)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="benchmarks.bench", description="Benchmarks de la veille")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help="Tailles à mesurer, au format PAGESxPOSTS (ex: 20x250)")
+    parser.add_argument("--days", type=int, default=30, help="Fenêtre des posts synthétiques, en jours")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Latence simulée de chaque requête à l'API Apify, en secondes")
+    parser.add_argument("--output", help="Fichier où écrire le tableau des résultats")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_pages, posts_per_page in args.sizes:
+            logger.info("⏱ %d pages x %d posts...", n_pages, posts_per_page)
+            rows += bench_size(n_pages, posts_per_page, args.days, args.latency, workdir)
+
+    table = pd.DataFrame(rows)[["taille", "posts", "étape", "secondes", "pic_mo", "requêtes_api"]]
+    table["requêtes_api"] = table["requêtes_api"].map(lambda n: "" if pd.isna(n) else int(n))
+    report = table.to_string(index=False, float_format=lambda x: f"{x:.3f}")
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
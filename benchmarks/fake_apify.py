@@ -0,0 +1,165 @@
+"""
+Client Apify local pour les benchmarks : sert des datasets synthétiques
+sans appel réseau, avec une latence configurable par requête.
+
+Seules les méthodes utilisées par utils.py sont implémentées :
+actor(...).start, dataset(...).list_items et run(...).wait_for_finish.
+"""
+import asyncio
+import itertools
+import random
+import time
+from utils import PAGE_INFO_ACTOR_ID, CREATION_DATE_FORMAT
+
+
+# Vocabulaire des textes synthétiques (mots courants, hashtags et mentions)
+WORDS = [
+    "banque", "crédit", "épargne", "compte", "agence", "taux", "prêt", "client",
+    "mobile", "paiement", "transfert", "assurance", "microfinance", "jeunes",
+    "entreprise", "financement", "digital", "service", "offre", "carte",
+    "le", "la", "les", "de", "des", "et", "pour", "avec", "votre", "nos"
+]
+HASHTAGS = ["#Promo", "#MoMo", "#Epargne", "#CEMAC", "#Fintech", "#Crédit"]
+MENTIONS = ["@MTN", "@Orange", "@Afriland", "@BICEC", "@UBA"]
+
+
+def synthetic_text(rng: random.Random, n_words: int = 40) -> str:
+    """Génère un post en français avec quelques hashtags, mentions et ponctuation."""
+    words = rng.choices(WORDS, k=n_words)
+    words += rng.sample(HASHTAGS, 2) + rng.sample(MENTIONS, 1)
+    rng.shuffle(words)
+    return " ".join(words).capitalize() + " ! 👉 Plus d'infos : 6 99 99 99 99."
+
+
+def synthetic_posts(page_id: str, n_posts: int, start_ts: int, end_ts: int, seed: int = 0) -> list:
+    """
+    Génère les posts d'une page répartis dans une fenêtre.
+
+    Un post sur deux a une date textuelle ("Monday, November 10, 2025 at
+    01:56 PM"), les autres un timestamp, comme l'actor posts.
+    """
+    rng = random.Random(f"{page_id}-{seed}")
+    span = max(start_ts - end_ts, 1)
+    posts = []
+    for k in range(n_posts):
+        ts = start_ts - (k * span) // max(n_posts, 1) - 60
+        creation_date = (
+            str(ts) if k % 2 else time.strftime(CREATION_DATE_FORMAT, time.localtime(ts))
+        )
+        posts.append({
+            "pageId": page_id,
+            "postId": f"{page_id}_{k}",
+            "text": synthetic_text(rng),
+            "creationDate": creation_date,
+            "likes": rng.randint(0, 500),
+            "url": f"https://www.facebook.com/{page_id}_{k}"
+        })
+    return posts
+
+
+class _ListPage:
+    def __init__(self, items: list, offset: int):
+        self.items = items
+        self.offset = offset
+        self.count = len(items)
+
+
+class FakeApifyClientAsync:
+    """
+    Remplace ApifyClientAsync : chaque run se termine immédiatement et son
+    dataset contient posts_per_page posts par page demandée.
+
+    Args:
+        posts_per_page (int): Nombre de posts servis pour chaque page
+        latency (float): Durée simulée de chaque requête à l'API, en secondes
+        run_duration (float): Durée simulée d'un run avant son statut SUCCEEDED
+    """
+
+    def __init__(self, token: str = None, posts_per_page: int = 100, latency: float = 0.0,
+                 run_duration: float = 0.0):
+        self.posts_per_page = posts_per_page
+        self.latency = latency
+        self.run_duration = run_duration
+        self.requests = 0
+        self._datasets = {}
+        self._runs = {}
+        self._ids = itertools.count()
+
+    async def _request(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def actor(self, actor_id: str):
+        return _FakeActor(self, actor_id)
+
+    def dataset(self, dataset_id: str):
+        return _FakeDataset(self, dataset_id)
+
+    def run(self, run_id: str):
+        return _FakeRun(self, run_id)
+
+    def _start(self, actor_id: str, run_input: dict) -> dict:
+        n = next(self._ids)
+        if actor_id == PAGE_INFO_ACTOR_ID:
+            items = [
+                {"facebookUrl": url, "page_id": str(100000 + sum(map(ord, url)) * 7919 % 900000),
+                 "name": url.rstrip("/").rsplit("/", 1)[-1]}
+                for url in run_input["urls"]
+            ]
+        else:
+            items = [
+                post
+                for page_input in run_input["input"]
+                for post in synthetic_posts(
+                    str(page_input["pageId"]), self.posts_per_page,
+                    page_input["startTime"], page_input["endTime"]
+                )
+            ]
+        run = {
+            "id": f"run{n}", "defaultDatasetId": f"dataset{n}", "status": "RUNNING",
+            "finishes_at": time.monotonic() + self.run_duration
+        }
+        self._datasets[run["defaultDatasetId"]] = items
+        self._runs[run["id"]] = run
+        return dict(run)
+
+
+class _FakeActor:
+    def __init__(self, client: FakeApifyClientAsync, actor_id: str):
+        self._client = client
+        self._actor_id = actor_id
+
+    async def start(self, run_input: dict = None, **kwargs) -> dict:
+        await self._client._request()
+        return self._client._start(self._actor_id, run_input)
+
+
+class _FakeDataset:
+    def __init__(self, client: FakeApifyClientAsync, dataset_id: str):
+        self._client = client
+        self._dataset_id = dataset_id
+
+    async def list_items(self, offset: int = 0, limit: int = None, fields: list = None, **kwargs):
+        await self._client._request()
+        items = self._client._datasets[self._dataset_id]
+        items = items[offset:offset + limit] if limit else items[offset:]
+        if fields:
+            items = [{key: item.get(key) for key in fields} for item in items]
+        return _ListPage(items, offset)
+
+
+class _FakeRun:
+    def __init__(self, client: FakeApifyClientAsync, run_id: str):
+        self._client = client
+        self._run_id = run_id
+
+    async def wait_for_finish(self, wait_secs: int = None) -> dict:
+        await self._client._request()
+        run = self._client._runs[self._run_id]
+        remaining = run["finishes_at"] - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(min(remaining, wait_secs or remaining))
+        if time.monotonic() >= run["finishes_at"]:
+            run["status"] = "SUCCEEDED"
+        return dict(run)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+import pandas as pd
+from store import DB_PATH
+
+
+# Durée de validité d'un résultat de scraping mis en cache : 1 heure
+RESULT_CACHE_TTL = 60 * 60
+
+# Limites du cache : nombre de résultats en mémoire et taille totale sur disque
+RESULT_CACHE_MAX_ENTRIES = 32
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def result_cache_key(countries: dict, days: int) -> str:
+    """
+    Calcule la clé de cache d'une demande de scraping.
+
+    Args:
+        countries (dict): Pays -> liste des URLs (clé None pour un scraping sans pays)
+        days (int): Nombre de jours scrapés
+
+    Returns:
+        str: Empreinte des listes d'URLs triées et de la fenêtre
+    """
+    groups = sorted(
+        [[country or "", sorted(urls)] for country, urls in countries.items()]
+    )
+    return hashlib.sha1(json.dumps([groups, days], ensure_ascii=False).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache des résultats normalisés de scraping, en mémoire et sur disque.
+
+    Les entrées expirent après ttl secondes. Les moins récemment utilisées sont
+    évincées au-delà de max_entries en mémoire et de max_bytes sur disque.
+    """
+
+    def __init__(self, path: str = DB_PATH, ttl: int = RESULT_CACHE_TTL,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    key         TEXT PRIMARY KEY,
+                    created_at  INTEGER NOT NULL,
+                    last_access INTEGER NOT NULL,
+                    size        INTEGER NOT NULL,
+                    payload     BLOB NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> pd.DataFrame:
+        """Retourne le résultat mis en cache pour une clé, ou None s'il est absent ou expiré."""
+        now = int(time.time())
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] >= now - self.ttl:
+                self._memory.move_to_end(key)
+                return entry[1]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT created_at, payload FROM result_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE result_cache SET last_access = ? WHERE key = ?", (now, key))
+
+        created_at, payload = row
+        data = pickle.loads(zlib.decompress(payload))
+        self._remember(key, created_at, data)
+        return data
+
+    def put(self, key: str, data: pd.DataFrame):
+        """Met en cache le résultat d'une demande de scraping."""
+        now = int(time.time())
+        payload = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        self._remember(key, now, data)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO result_cache (key, created_at, last_access, size, payload)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    created_at = excluded.created_at,
+                    last_access = excluded.last_access,
+                    size = excluded.size,
+                    payload = excluded.payload
+                """,
+                (key, now, now, len(payload), payload)
+            )
+            self._evict(conn, now)
+
+    def invalidate(self, key: str = None):
+        """Supprime une entrée du cache, ou tout le cache si key est None."""
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+        with self._connect() as conn:
+            if key is None:
+                conn.execute("DELETE FROM result_cache")
+            else:
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+
+    def _remember(self, key: str, created_at: int, data: pd.DataFrame):
+        with self._lock:
+            self._memory[key] = (created_at, data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn, now: int):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_bytes."""
+        conn.execute("DELETE FROM result_cache WHERE created_at < ?", (now - self.ttl,))
+        total = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM result_cache ORDER BY last_access DESC"
+        ).fetchall():
+            total += size
+            if total > self.max_bytes:
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
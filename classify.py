@@ -0,0 +1,228 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from dedup import normalize_words
+
+
+# Types de posts et mots-clés qui les signalent (sans accents, en minuscules ;
+# un * final accepte toutes les terminaisons). Le type qui cumule le plus de
+# mots-clés l'emporte ; à égalité, le premier de la liste.
+TYPE_KEYWORDS = {
+    "Recrutement": [
+        "recrut*", "offre d emploi", "offres d emploi", "candidat*", "postul*", "cv", "stage*",
+        "stagiaire*", "poste a pourvoir", "postes a pourvoir", "profil recherche", "emploi*"
+    ],
+    "Promotion": [
+        "promo*", "offre*", "reduction*", "remise*", "bonus", "gratuit*", "cadeau*", "concours",
+        "gagne*", "gagnez", "tirage au sort", "profitez", "exceptionnel*", "jusqu au"
+    ],
+    "Produit": [
+        "compte*", "carte*", "credit*", "pret*", "epargne*", "application*", "appli", "mobile money",
+        "momo", "transfert*", "paiement*", "souscri*", "assurance*", "taux", "financement*",
+        "decouvrez", "nouveau service", "nouvelle offre"
+    ],
+    "Institutionnel": [
+        "assemblee generale", "conseil d administration", "resultats", "bilan*", "partenariat*",
+        "convention*", "signature", "nomination*", "directeur general", "agrement*", "rapport annuel",
+        "communique*", "inauguration*", "siege", "capital", "dividende*", "gouvernance"
+    ],
+    "Événement": [
+        "evenement*", "salon*", "forum*", "conference*", "webinaire*", "seminaire*", "atelier*",
+        "ceremonie*", "lancement", "rendez vous", "en direct", "live", "participez"
+    ],
+    "Sensibilisation": [
+        "astuce*", "conseil", "conseils", "fraude*", "arnaque*", "escroc*", "vigilan*", "securite",
+        "securis*", "mot de passe", "code pin", "education financiere", "sensibilis*", "ne communiquez"
+    ],
+    "Vœux": [
+        "bonne fete", "joyeux", "joyeuse", "voeux", "bonne annee", "journee internationale",
+        "ramadan", "tabaski", "noel", "paques", "fete de l independance", "fete du travail"
+    ],
+}
+
+# Type des posts sans aucun mot-clé reconnu
+DEFAULT_TYPE = "Autre"
+
+# Mots positifs et négatifs du score de sentiment ; un mot précédé d'une
+# négation compte dans l'autre sens ("pas satisfait"). "plus" n'est une
+# négation qu'après ne / n' ("n'est plus disponible", mais "plus rapide")
+POSITIVE_WORDS = [
+    "merci", "felicit*", "heureu*", "fier", "fiere*", "fiers", "excellen*", "succes", "reussi*",
+    "bravo", "joie", "meilleur*", "avantage*", "facile*", "rapide*", "satisf*", "bienvenue", "plaisir",
+    "innov*", "ravi*", "record", "confiance", "solidari*", "gagnant*", "simple*", "securise*"
+]
+NEGATIVE_WORDS = [
+    "probleme*", "panne*", "perturbation*", "indisponib*", "retard*", "fraude*", "arnaque*",
+    "escroc*", "plainte*", "deces", "condoleances", "regret*", "desole*", "danger*", "interruption*",
+    "incident*", "erreur*", "perte*", "crise", "suspen*", "fermeture*", "annul*", "deplor*",
+    "difficulte*", "dysfonctionnement*", "insatisf*"
+]
+NEGATIONS = ["pas", "sans", "aucun", "aucune", "jamais", "ni", r"(?:ne|n)(?: \w+)? plus"]
+POSITIVE_EMOJIS = "🎉🥳👏👍😊😀😃😍❤💚💙🔥🏆✅🙏"
+NEGATIVE_EMOJIS = "⚠😢😭😡😞❌🚫💔"
+
+# Titre généré : première phrase du post, coupée à TITLE_MAX_LENGTH caractères
+TITLE_MAX_LENGTH = 80
+
+# Taille de lot à partir de laquelle classify_texts répartit le travail sur plusieurs processus
+PARALLEL_MIN_TEXTS = 5_000
+CLASSIFY_CHUNK_SIZE = 500
+
+# Modèle local optionnel (pipeline scikit-learn enregistré avec joblib) :
+# il n'est consulté que pour les posts qu'aucun mot-clé ne classe
+MODEL_PATH = os.environ.get("VEILLE_CLASSIFIER_MODEL")
+
+
+def _keyword_alternatives(keywords: list) -> str:
+    """Traduit des mots-clés (normalisés comme les textes) en alternatives d'expression régulière."""
+    alternatives = []
+    for keyword in sorted(keywords, key=len, reverse=True):
+        words = " ".join(normalize_words(keyword))
+        alternatives.append(re.escape(words) + (r"\w*" if keyword.endswith("*") else ""))
+    return "|".join(alternatives)
+
+
+# Une seule passe par texte : un groupe nommé par type (t0, t1...) ; pour le
+# sentiment, la négation éventuelle puis un groupe pos ou neg
+_TYPE_GROUPS = {f"t{i}": name for i, name in enumerate(TYPE_KEYWORDS)}
+TYPE_PATTERN = re.compile(r"\b(?:" + "|".join(
+    f"(?P<{group}>{_keyword_alternatives(TYPE_KEYWORDS[name])})" for group, name in _TYPE_GROUPS.items()
+) + r")\b")
+SENTIMENT_PATTERN = re.compile(
+    r"\b(?:(?P<negation>" + "|".join(NEGATIONS) + r") )?"
+    r"(?:(?P<pos>" + _keyword_alternatives(POSITIVE_WORDS) + r")|(?P<neg>" + _keyword_alternatives(NEGATIVE_WORDS) + r"))\b"
+)
+EMOJI_PATTERNS = (re.compile(f"[{POSITIVE_EMOJIS}]"), re.compile(f"[{NEGATIVE_EMOJIS}]"))
+
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+# Hashtags supprimés, mentions gardées sans @, symboles et émojis supprimés
+TITLE_CLEAN_PATTERN = re.compile(r"#\w+|[^\w\s'’,.:;!?«»\"()%€$-]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_model = None
+
+
+def post_type(normalized: str) -> str:
+    """Retourne le type d'un texte normalisé d'après les mots-clés de TYPE_KEYWORDS (None si aucun)."""
+    scores = dict.fromkeys(TYPE_KEYWORDS, 0)
+    for match in TYPE_PATTERN.finditer(normalized):
+        scores[_TYPE_GROUPS[match.lastgroup]] += 1
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def sentiment_score(text: str, normalized: str) -> float:
+    """
+    Calcule un score de sentiment entre -1 (négatif) et 1 (positif).
+
+    Args:
+        text (str): Texte d'origine (pour les émojis)
+        normalized (str): Texte normalisé (voir normalize_words)
+
+    Returns:
+        float: Score arrondi à deux décimales, 0 si aucun indice
+    """
+    positive = negative = 0
+    for match in SENTIMENT_PATTERN.finditer(normalized):
+        if (match.lastgroup == "pos") != bool(match.group("negation")):
+            positive += 1
+        else:
+            negative += 1
+    positive += len(EMOJI_PATTERNS[0].findall(text))
+    negative += len(EMOJI_PATTERNS[1].findall(text))
+    if not positive + negative:
+        return 0.0
+    return round((positive - negative) / (positive + negative), 2)
+
+
+def generate_title(text: str) -> str:
+    """Génère un titre à partir de la première phrase significative du post (3 mots au moins)."""
+    text = TITLE_CLEAN_PATTERN.sub(" ", URL_PATTERN.sub(" ", text)).replace("@", "")
+    sentences = [" ".join(s.split()).strip(" ,;:-") for s in SENTENCE_PATTERN.split(text)]
+    sentences = [s for s in sentences if s]
+    if not sentences:
+        return ""
+    title = next((s for s in sentences if len(s.split()) >= 3), sentences[0])
+    if len(title) > TITLE_MAX_LENGTH:
+        title = title[:TITLE_MAX_LENGTH - 1].rsplit(" ", 1)[0].rstrip(" ,;:-") + "…"
+    return title[0].upper() + title[1:]
+
+
+def _load_model():
+    """Charge le modèle local optionnel (une fois par processus), None s'il n'est pas configuré."""
+    global _model
+    if _model is None and MODEL_PATH and os.path.exists(MODEL_PATH):
+        # Import tardif : joblib et scikit-learn ne sont nécessaires qu'avec un modèle
+        import joblib
+        _model = joblib.load(MODEL_PATH)
+    return _model
+
+
+def classify_text(text) -> tuple:
+    """
+    Classe un post : type, titre généré et score de sentiment.
+
+    Returns:
+        tuple: (type, titre, sentiment)
+    """
+    if not isinstance(text, str) or not text.strip():
+        return DEFAULT_TYPE, "", 0.0
+    normalized = " ".join(normalize_words(text))
+    label = post_type(normalized)
+    if label is None:
+        model = _load_model()
+        label = str(model.predict([text])[0]) if model is not None else DEFAULT_TYPE
+    return label, generate_title(text), sentiment_score(text, normalized)
+
+
+def classify_texts(texts: pd.Series, processes: int = None) -> pd.DataFrame:
+    """
+    Classe toute une colonne de textes (voir classify_text).
+
+    Au-delà de PARALLEL_MIN_TEXTS textes, le travail est réparti par lots
+    sur un pool de processus.
+
+    Args:
+        texts (pd.Series): Textes des posts
+        processes (int): Nombre de processus (1 pour désactiver le pool)
+
+    Returns:
+        pd.DataFrame: Colonnes type, title et sentiment, avec l'index de texts
+    """
+    if processes != 1 and len(texts) >= PARALLEL_MIN_TEXTS:
+        with ProcessPoolExecutor(processes) as pool:
+            labels = list(pool.map(classify_text, texts, chunksize=CLASSIFY_CHUNK_SIZE))
+    else:
+        labels = [classify_text(text) for text in texts]
+    return pd.DataFrame(labels, index=texts.index, columns=["type", "title", "sentiment"])
+
+
+def label_posts(store, posts: pd.DataFrame, processes: int = None) -> int:
+    """
+    Classe les posts qui ne l'ont pas encore été et enregistre leurs étiquettes.
+
+    Les étiquettes sont gardées par (page_id, post_id) : un post déjà classé
+    n'est jamais reclassé, même s'il est de nouveau récupéré.
+
+    Args:
+        store (PostStore): Stockage local
+        posts (pd.DataFrame): Posts normalisés (colonnes page_id, post_id et text)
+        processes (int): Nombre de processus (voir classify_texts)
+
+    Returns:
+        int: Nombre de posts classés
+    """
+    if posts.empty:
+        return 0
+    page_ids = posts["page_id"].astype(str)
+    post_ids = posts["post_id"].astype(str)
+    labeled = store.labeled_posts(list(zip(page_ids, post_ids)))
+    todo = posts[[key not in labeled for key in zip(page_ids, post_ids)]]
+    if todo.empty:
+        return 0
+    labels = classify_texts(todo["text"], processes)
+    store.save_labels(list(zip(
+        page_ids[todo.index], post_ids[todo.index], labels["type"], labels["title"], labels["sentiment"]
+    )))
+    return len(todo)
@@ -0,0 +1,144 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+import numpy as np
+import pandas as pd
+
+
+# Signatures MinHash : NUM_PERM permutations découpées en LSH_BANDS bandes de
+# LSH_ROWS lignes. Deux posts de similarité de Jaccard 0,7 partagent au moins
+# une bande avec une probabilité > 98 % ; à 0,3, avec une probabilité < 13 %.
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Similarité (estimée) au-delà de laquelle deux posts sont des reprises du même contenu
+DUPLICATE_THRESHOLD = 0.7
+
+# Taille des shingles, en mots
+SHINGLE_SIZE = 3
+
+# Permutations (a * h + b) mod MERSENNE_PRIME, tirées une fois pour toutes :
+# les signatures stockées restent comparables d'une exécution à l'autre
+MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+
+# Clés des bandes LSH : sel propre à chaque bande et multiplicateur du hachage
+_BAND_SALT = np.arange(1, LSH_BANDS + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+_FNV_PRIME = np.uint64(1099511628211)
+
+WORD_PATTERN = re.compile(r"\w+")
+COMBINING_PATTERN = re.compile(r"[\u0300-\u036f]")
+# Ligatures que NFKD ne décompose pas ("vœux" -> "voeux"), après casefold
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae"})
+
+
+def normalize_words(text) -> list:
+    """Découpe un texte en mots minuscules sans accents, ligatures ni ponctuation."""
+    if not isinstance(text, str):
+        return []
+    text = text.casefold()
+    if not text.isascii():
+        text = COMBINING_PATTERN.sub("", unicodedata.normalize("NFKD", text.translate(LIGATURES)))
+    return WORD_PATTERN.findall(text)
+
+
+def content_hash(words: list) -> str:
+    """Empreinte exacte d'un texte normalisé (mêmes mots dans le même ordre)."""
+    return hashlib.sha1(" ".join(words).encode()).hexdigest()
+
+
+def minhash_signature(words: list) -> np.ndarray:
+    """
+    Calcule la signature MinHash des shingles de SHINGLE_SIZE mots d'un texte.
+
+    Returns:
+        np.ndarray: NUM_PERM valeurs (uint32)
+    """
+    shingles = {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))
+    }
+    hashes = np.fromiter((zlib.crc32(s.encode()) & MERSENNE_PRIME for s in shingles), dtype=np.uint64)
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list:
+    """Retourne la clé LSH (entier 64 bits signé) de chaque bande d'une signature."""
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS).astype(np.uint64)
+    keys = _BAND_SALT.copy()
+    for col in range(LSH_ROWS):
+        # Hachage polynomial modulo 2^64 (dépassement volontaire des uint64)
+        keys = keys * _FNV_PRIME + rows[:, col]
+    return keys.view(np.int64).tolist()
+
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estime la similarité de Jaccard de deux textes à partir de leurs signatures."""
+    return float(np.mean(signature == other))
+
+
+def assign_clusters(store, posts: pd.DataFrame) -> pd.Series:
+    """
+    Rattache des posts nouvellement stockés aux groupes de contenus déjà vus.
+
+    Un post rejoint le groupe d'un texte identique (empreinte exacte) ou, à
+    défaut, d'un texte proche trouvé par LSH puis vérifié sur la signature
+    MinHash du premier post du groupe. Sinon il fonde un nouveau groupe.
+    Chaque lot coûte trois requêtes au stockage, quel que soit le volume déjà
+    indexé : aucune comparaison deux à deux.
+
+    Args:
+        store (PostStore): Stockage local
+        posts (pd.DataFrame): Posts normalisés (colonnes page_id, post_id et text)
+
+    Returns:
+        pd.Series: True pour les reprises d'un contenu déjà vu, avec l'index de posts
+    """
+    duplicate = pd.Series(False, index=posts.index)
+    words = [normalize_words(text) for text in posts["text"]]
+    hashes = [content_hash(w) if w else None for w in words]
+
+    known_hashes = store.clusters_by_hash([h for h in hashes if h])
+    signatures = {}
+    keys = {}
+    for i, (w, h) in enumerate(zip(words, hashes)):
+        if h and h not in known_hashes:
+            signatures[i] = minhash_signature(w)
+            keys[i] = band_keys(signatures[i])
+    buckets, cluster_signatures = store.lsh_candidates([k for ks in keys.values() for k in ks])
+    cluster_signatures = {
+        cluster_id: np.frombuffer(blob, dtype="<u4") for cluster_id, blob in cluster_signatures.items()
+    }
+
+    assignments, new_clusters, new_buckets = [], [], []
+    for i, (index, page_id, post_id) in enumerate(zip(posts.index, posts["page_id"], posts["post_id"])):
+        h = hashes[i]
+        if h is None:
+            continue
+        cluster_id = known_hashes.get(h)
+        if cluster_id is None:
+            candidates = {c for key in keys[i] for c in buckets.get(key, ())}
+            cluster_id = next(
+                (c for c in sorted(candidates)
+                 if similarity(signatures[i], cluster_signatures[c]) >= DUPLICATE_THRESHOLD),
+                None
+            )
+        if cluster_id is None:
+            cluster_id = f"{page_id}:{post_id}"
+            new_clusters.append((cluster_id, signatures[i].astype("<u4").tobytes()))
+            cluster_signatures[cluster_id] = signatures[i]
+            for key in keys[i]:
+                buckets.setdefault(key, []).append(cluster_id)
+                new_buckets.append((key, cluster_id))
+        else:
+            duplicate[index] = True
+        known_hashes[h] = cluster_id
+        assignments.append((str(page_id), str(post_id), cluster_id, h))
+
+    store.save_clusters(assignments, new_clusters, new_buckets)
+    return duplicate
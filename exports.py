@@ -0,0 +1,238 @@
+import gzip
+import importlib.util
+import io
+import tempfile
+from functools import partial
+import pandas as pd
+from metrics import RunMetrics
+
+
+# Caractères de contrôle ASCII interdits par Excel, sauf tabulation (9), newline (10), carriage return (13)
+ILLEGAL_EXCEL_CHARS = dict.fromkeys([*range(0, 9), 11, 12, *range(14, 32)])
+
+# Largeur maximale d'une colonne Excel et nombre de lignes converties à la fois
+MAX_COLUMN_WIDTH = 50
+EXPORT_CHUNK_ROWS = 10_000
+
+# Niveau de compression gzip des exports CSV (6 : bon compromis taille / temps)
+GZIP_LEVEL = 6
+
+
+def clean_excel_series(series: pd.Series) -> pd.Series:
+    """Supprime les caractères illégaux pour Excel d'une colonne texte."""
+    return series.str.translate(ILLEGAL_EXCEL_CHARS)
+
+
+def hyperlink_formulas(urls: pd.Series) -> pd.Series:
+    """Transforme une colonne d'URLs en formules Excel =HYPERLINK (valeur manquante pour ce qui n'est pas une URL)."""
+    urls = urls.astype("string")
+    escaped = urls.str.replace('"', '""', regex=False)
+    formulas = '=HYPERLINK("' + escaped + '", "' + escaped + '")'
+    return formulas.where(urls.str.startswith("http").fillna(False))
+
+
+def column_widths(df: pd.DataFrame) -> list:
+    """
+    Calcule la largeur d'affichage de chaque colonne.
+
+    Returns:
+        list: Largeur de chaque colonne, bornée à MAX_COLUMN_WIDTH
+    """
+    widths = []
+    for col in df.columns:
+        lengths = df[col].astype(str).str.len()
+        max_length = max(lengths.max() if len(lengths) else 0, len(str(col)))
+        widths.append(min(max_length + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def write_excel(df: pd.DataFrame, output, sheet_name: str = "Posts Facebook", link_columns: list = ()):
+    """
+    Écrit un DataFrame dans un fichier Excel en mémoire constante.
+
+    Les lignes sont écrites dans l'ordre et vidées sur disque au fil de
+    l'eau (mode constant_memory de xlsxwriter) : le classeur n'est jamais
+    chargé entièrement en mémoire. Les textes sont toujours écrits comme
+    textes, même s'ils commencent par "=" : seuls les liens de link_columns
+    deviennent des formules.
+
+    Args:
+        df (pd.DataFrame): Données à exporter
+        output: Chemin du fichier ou objet fichier binaire
+        sheet_name (str): Nom de la feuille
+        link_columns (list): Colonnes d'URLs écrites en liens cliquables (formules =HYPERLINK)
+    """
+    # Import tardif : xlsxwriter n'est chargé qu'au premier export
+    import xlsxwriter
+
+    text_columns = df.select_dtypes(include=["object", "string", "category"]).columns
+    link_positions = [df.columns.get_loc(col) for col in link_columns]
+
+    workbook = xlsxwriter.Workbook(output, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd",
+        "strings_to_formulas": False
+    })
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({"bold": True, "border": 1})
+
+        # Ajuster la largeur des colonnes
+        for idx, width in enumerate(column_widths(df)):
+            worksheet.set_column(idx, idx, width)
+
+        worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+
+        row_idx = 1
+        for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS].copy()
+            for col in text_columns:
+                chunk[col] = clean_excel_series(chunk[col])
+            links = [hyperlink_formulas(chunk[col]).tolist() for col in link_columns]
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for i, row in enumerate(chunk.itertuples(index=False, name=None)):
+                worksheet.write_row(row_idx, 0, row)
+                # Même ligne : compatible avec le mode constant_memory
+                for position, formulas in zip(link_positions, links):
+                    if formulas[i] is not pd.NA:
+                        worksheet.write_formula(row_idx, position, formulas[i], None, row[position])
+                row_idx += 1
+    finally:
+        workbook.close()
+
+
+def to_excel_bytes(df: pd.DataFrame, sheet_name: str = "Posts Facebook", link_columns: list = ()) -> bytes:
+    """Retourne le contenu du fichier Excel d'un DataFrame."""
+    output = io.BytesIO()
+    write_excel(df, output, sheet_name, link_columns)
+    return output.getvalue()
+
+
+def parquet_available() -> bool:
+    """Indique si pyarrow (dépendance optionnelle de l'export Parquet) est installé."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def write_csv(chunks, output, compress: bool = False):
+    """
+    Écrit des lots de posts dans un fichier CSV, éventuellement compressé en gzip.
+
+    Chaque lot est converti puis écrit avant de lire le suivant : la mémoire
+    utilisée ne dépend pas du nombre total de posts.
+
+    Args:
+        chunks: Itérable de DataFrames de mêmes colonnes (ex: PostStore.load_posts_chunks)
+        output: Chemin du fichier ou objet fichier binaire
+        compress (bool): Compresse le fichier en gzip (.csv.gz)
+    """
+    raw = open(output, "wb") if isinstance(output, str) else output
+    binary = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL) if compress else raw
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(text, index=False, header=i == 0)
+        text.flush()
+    finally:
+        # Détacher le flux texte pour ne pas fermer un objet fichier fourni par l'appelant
+        text.detach()
+        if compress:
+            binary.close()
+        if raw is not output:
+            raw.close()
+
+
+def write_parquet(chunks, output):
+    """
+    Écrit des lots de posts dans un fichier Parquet, un groupe de lignes par lot.
+
+    Args:
+        chunks: Itérable de DataFrames de mêmes colonnes (ex: PostStore.load_posts_chunks)
+        output: Chemin du fichier ou objet fichier binaire
+
+    Raises:
+        ImportError: Si pyarrow n'est pas installé
+    """
+    # Import tardif : pyarrow est une dépendance optionnelle
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            # Colonnes texte en chaînes simples : les catégories et les colonnes
+            # entièrement vides d'un lot ne doivent pas changer le schéma du fichier
+            text_columns = chunk.select_dtypes(include=["object", "string", "category"]).columns
+            chunk = chunk.astype({col: "string" for col in text_columns})
+            if schema is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for col in text_columns:
+                    index = schema.get_field_index(str(col))
+                    schema = schema.set(index, pa.field(str(col), pa.string()))
+                writer = pq.ParquetWriter(output, schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        if writer is None:
+            pq.write_table(pa.table({}), output)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# Formats d'export par lots : extension du fichier -> (fonction d'écriture, type MIME)
+ARCHIVE_FORMATS = {
+    "csv.gz": (partial(write_csv, compress=True), "application/gzip"),
+    "csv": (write_csv, "text/csv"),
+    "parquet": (write_parquet, "application/vnd.apache.parquet"),
+}
+
+
+def archive_format(path: str) -> str:
+    """Retourne le format d'export par lots correspondant à l'extension d'un fichier (None si aucun)."""
+    return next((fmt for fmt in ARCHIVE_FORMATS if path.lower().endswith("." + fmt)), None)
+
+
+def write_archive(chunks, output, fmt: str):
+    """
+    Écrit des lots de posts dans le format demandé (voir ARCHIVE_FORMATS).
+
+    Args:
+        chunks: Itérable de DataFrames de mêmes colonnes
+        output: Chemin du fichier ou objet fichier binaire
+        fmt (str): "csv.gz", "csv" ou "parquet"
+    """
+    write, _ = ARCHIVE_FORMATS[fmt]
+    write(chunks, output)
+
+
+def deferred_export(write, stage: str, run_id: str = None, items: int = None):
+    """
+    Prépare un export généré seulement au clic sur un bouton de téléchargement.
+
+    Streamlit appelle la fonction renvoyée dans un thread séparé, sans
+    bloquer ni alourdir les réexécutions de la page. L'export est d'abord
+    écrit dans un fichier temporaire sur disque, puis relu en une fois (format
+    accepté par st.download_button) ; sa durée de génération est ajoutée au
+    journal des mesures.
+
+    Args:
+        write (callable): Fonction écrivant l'export dans un objet fichier binaire
+        stage (str): Nom de l'étape dans le journal des mesures
+        run_id (str): Identifiant du scraping des résultats exportés
+        items (int): Nombre de posts exportés, si connu
+
+    Returns:
+        callable: Fonction sans argument renvoyant le contenu du fichier (bytes)
+    """
+    def generate() -> bytes:
+        metrics = RunMetrics(run_id)
+        with tempfile.TemporaryFile() as output:
+            with metrics.stage(stage, items=items) as record:
+                write(output)
+                record["bytes"] = output.tell()
+            output.seek(0)
+            data = output.read()
+        try:
+            metrics.write()
+        except OSError:
+            pass
+        return data
+    return generate
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from store import PostStore, POST_COLUMNS, compact_posts
+from cache import ResultCache, result_cache_key
+from utils import scrape_countries, log_progress
+from metrics import RunMetrics, METRICS_LOG_PATH
+
+
+# États d'un travail de scraping
+ACTIVE_STATUSES = {"pending", "running"}
+
+# Nombre de résultats conservés en mémoire (les autres sont relus depuis le stockage)
+MAX_RESULTS_IN_MEMORY = 16
+
+
+class JobManager:
+    """
+    Exécute les scrapings en arrière-plan et suit leur état dans la table jobs.
+
+    Un seul gestionnaire est partagé par toutes les sessions du serveur : deux
+    demandes identiques (mêmes pages, même fenêtre) lancées pendant qu'un run
+    est en cours partagent ce run au lieu de relancer les actors, et une
+    demande déjà servie récemment est relue depuis le cache de résultats.
+    """
+
+    def __init__(self, store: PostStore = None, cache: ResultCache = None, max_workers: int = 2,
+                 metrics_log: str = METRICS_LOG_PATH):
+        self.store = store or PostStore()
+        self.cache = cache or ResultCache(self.store.path)
+        self.metrics_log = metrics_log
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="scrape-job")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._metrics = OrderedDict()
+        # Les travaux d'un précédent processus ne reprendront pas
+        self.store.interrupt_jobs()
+
+    def submit(self, api_token: str, countries: dict, days: int = 7, incremental: bool = True,
+               refresh_pages: bool = False, max_concurrency: int = 4, use_cache: bool = True) -> str:
+        """
+        Soumet un scraping, ou rejoint un scraping identique déjà en cours.
+
+        Args:
+            api_token (str): Token API Apify
+            countries (dict): Pays -> liste des URLs (clé None pour un scraping sans pays)
+            days (int): Nombre de jours à scraper
+            incremental (bool): Ne récupérer que les nouveaux posts de chaque page
+            refresh_pages (bool): Ignorer le cache des informations de pages
+            max_concurrency (int): Nombre maximal de runs d'actors simultanés
+            use_cache (bool): Servir depuis le cache de résultats une demande identique récente
+                (jamais pour un scraping complet, qui demande des données fraîches)
+
+        Returns:
+            str: Identifiant du travail
+        """
+        groups = [[country, sorted(urls)] for country, urls in countries.items()]
+        request_key = hashlib.sha1(
+            json.dumps([groups, days, incremental], ensure_ascii=False).encode()
+        ).hexdigest()
+
+        params = {
+            "groups": groups,
+            "days": days,
+            "incremental": incremental,
+            "since_ts": int(time.time()) - days * 24 * 60 * 60
+        }
+
+        # Demande identique servie récemment : aucun run d'actor. Un scraping complet
+        # (incremental=False) relance toujours les actors ; son résultat alimente le cache
+        job_id = uuid.uuid4().hex[:12]
+        metrics = RunMetrics(job_id)
+        with metrics.stage("result_cache") as stage:
+            cached = self.cache.get(result_cache_key(countries, days)) if use_cache and incremental else None
+            stage["items"] = None if cached is None else len(cached)
+        if cached is not None:
+            self.store.create_job(job_id, request_key, params)
+            self._remember(job_id, cached)
+            self._keep_metrics(job_id, metrics)
+            self.store.update_job(
+                job_id, status="done", message=f"⚡ {len(cached)} posts servis depuis le cache",
+                n_posts=len(cached)
+            )
+            return job_id
+
+        with self._lock:
+            inflight_id = self._inflight.get(request_key)
+            if inflight_id is not None:
+                return inflight_id
+
+            self.store.create_job(job_id, request_key, params)
+            self._inflight[request_key] = job_id
+
+        self._executor.submit(
+            self._run, job_id, request_key, api_token, countries, days,
+            incremental, refresh_pages, max_concurrency, metrics
+        )
+        return job_id
+
+    def status(self, job_id: str) -> dict:
+        """Retourne l'état d'un travail (status, message, n_posts...), ou None s'il est inconnu."""
+        return self.store.get_job(job_id)
+
+    def recent(self, limit: int = 10) -> list:
+        """Retourne les derniers travaux soumis."""
+        return self.store.recent_jobs(limit)
+
+    def result(self, job_id: str) -> pd.DataFrame:
+        """
+        Retourne les posts d'un travail terminé.
+
+        Les résultats récents sont gardés en mémoire ; les plus anciens sont
+        relus depuis le stockage local avec les paramètres du travail.
+
+        Returns:
+            pd.DataFrame: Posts du travail, ou None s'il n'est pas terminé
+        """
+        with self._lock:
+            if job_id in self._results:
+                self._results.move_to_end(job_id)
+                return self._results[job_id]
+
+        job = self.store.get_job(job_id)
+        if job is None or job["status"] != "done":
+            return None
+
+        frames = []
+        for country, urls in job["params"]["groups"]:
+            data = self.store.load_posts(self.store.page_ids_for_urls(urls), job["params"]["since_ts"])
+            if country is not None:
+                data["Pays"] = country
+            frames.append(data)
+        data = compact_posts(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame(columns=POST_COLUMNS)
+        self._remember(job_id, data)
+        return data
+
+    def metrics(self, job_id: str) -> RunMetrics:
+        """Retourne les mesures par étape d'un travail récent, ou None si elles ne sont plus en mémoire."""
+        with self._lock:
+            return self._metrics.get(job_id)
+
+    def _remember(self, job_id: str, data: pd.DataFrame):
+        with self._lock:
+            self._results[job_id] = data
+            while len(self._results) > MAX_RESULTS_IN_MEMORY:
+                self._results.popitem(last=False)
+
+    def _keep_metrics(self, job_id: str, metrics: RunMetrics):
+        """Garde les mesures d'un travail terminé en mémoire et les ajoute au journal."""
+        with self._lock:
+            self._metrics[job_id] = metrics
+            while len(self._metrics) > MAX_RESULTS_IN_MEMORY:
+                self._metrics.popitem(last=False)
+        try:
+            metrics.write(self.metrics_log)
+        except OSError as e:
+            log_progress(f"⚠️ Journal des mesures non écrit : {e}", "error")
+
+    def _run(self, job_id: str, request_key: str, api_token: str, countries: dict, days: int,
+             incremental: bool, refresh_pages: bool, max_concurrency: int, metrics: RunMetrics):
+        errors = []
+
+        def progress(message: str, level: str = "info"):
+            log_progress(message, level)
+            if level == "error":
+                errors.append(message)
+            self.store.update_job(job_id, message=message)
+
+        try:
+            self.store.update_job(job_id, status="running")
+            results = scrape_countries(
+                api_token, countries, days, max_concurrency=max_concurrency,
+                incremental=incremental, store=self.store,
+                refresh_pages=refresh_pages, progress=progress, metrics=metrics
+            )
+            data = compact_posts(pd.concat(results.values(), ignore_index=True))
+            self._remember(job_id, data)
+            if not errors:
+                with metrics.stage("result_cache_put", items=len(data)):
+                    self.cache.put(result_cache_key(countries, days), data)
+            self.store.update_job(
+                job_id,
+                status="failed" if errors and data.empty else "done",
+                message=" ".join(errors) if errors else f"✅ {len(data)} posts récupérés",
+                n_posts=len(data)
+            )
+        except Exception as e:
+            self.store.update_job(job_id, status="failed", message=f"❌ Erreur lors du scraping: {str(e)}")
+        finally:
+            self._keep_metrics(job_id, metrics)
+            with self._lock:
+                self._inflight.pop(request_key, None)
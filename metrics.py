@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+
+
+# Journal JSON-lines des mesures de tous les scrapings (une ligne par étape)
+METRICS_LOG_PATH = "veille_metrics.jsonl"
+
+# Colonnes affichées dans le panneau de diagnostic
+METRICS_COLUMNS = [
+    "stage", "label", "seconds", "items", "bytes", "apify_run_id", "status",
+    "compute_units", "usage_usd", "attempts"
+]
+
+
+class RunMetrics:
+    """
+    Mesures par étape d'un scraping ou d'un affichage de résultats.
+
+    Chaque étape est un enregistrement (dict) : nom de l'étape, libellé
+    (pays), durée en secondes et compteurs libres (items, octets, run Apify,
+    unités de calcul...). La collecte est partagée sans risque entre la
+    boucle asyncio du scraping et les threads du gestionnaire de travaux.
+    """
+
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, label: str = None, **fields):
+        """
+        Mesure la durée d'un bloc de code.
+
+        Le dictionnaire renvoyé peut être complété dans le bloc (items, bytes...).
+
+        Exemple :
+            with metrics.stage("export_excel") as stage:
+                data = to_excel_bytes(df)
+                stage["bytes"] = len(data)
+        """
+        record = {"stage": name, "label": label, **fields}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self.add(record)
+
+    def add(self, record: dict):
+        """Ajoute un enregistrement déjà mesuré."""
+        record = {"run_id": self.run_id, "ts": int(time.time()), **record}
+        with self._lock:
+            self.records.append(record)
+
+    def accumulate(self, name: str, label: str = None, seconds: float = 0.0, **counts):
+        """
+        Cumule la durée et les compteurs d'une étape répétée (ex: un lot de posts).
+
+        Args:
+            name (str): Nom de l'étape
+            label (str): Libellé (pays) de l'étape
+            seconds (float): Durée à ajouter
+            **counts: Compteurs à ajouter (items, bytes...)
+        """
+        with self._lock:
+            for record in self.records:
+                if record["stage"] == name and record.get("label") == label:
+                    break
+            else:
+                record = {"run_id": self.run_id, "ts": int(time.time()), "stage": name, "label": label, "seconds": 0.0}
+                self.records.append(record)
+            record["seconds"] += seconds
+            for key, value in counts.items():
+                record[key] = record.get(key, 0) + value
+
+    def to_frame(self) -> pd.DataFrame:
+        """Retourne les mesures sous forme de tableau (colonnes METRICS_COLUMNS présentes)."""
+        with self._lock:
+            frame = pd.DataFrame(self.records)
+        return frame[[col for col in METRICS_COLUMNS if col in frame.columns]]
+
+    def write(self, path: str = METRICS_LOG_PATH):
+        """Ajoute les mesures au journal JSON-lines."""
+        with self._lock:
+            lines = [json.dumps(record, ensure_ascii=False, default=str) for record in self.records]
+        if lines:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+
+def run_stats(run: dict) -> dict:
+    """
+    Extrait l'identifiant, le statut et le coût d'un run Apify terminé.
+
+    Returns:
+        dict: apify_run_id, status, compute_units et usage_usd (None si inconnus)
+    """
+    return {
+        "apify_run_id": run.get("id"),
+        "status": run.get("status"),
+        "compute_units": (run.get("stats") or {}).get("computeUnits"),
+        "usage_usd": run.get("usageTotalUsd")
+    }
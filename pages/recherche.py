@@ -0,0 +1,134 @@
+import streamlit as st
+import json
+import time
+from datetime import date, datetime, timedelta
+from store import PostStore
+from utils import build_search_query
+
+
+# Nombre de posts par page de résultats
+PAGE_SIZES = [25, 50, 100]
+
+
+def main():
+    st.set_page_config(
+        page_title="Recherche dans les posts",
+        page_icon="🔎",
+        layout="wide"
+    )
+
+    st.title("🔎 Recherche dans les posts stockés")
+    st.markdown("Retrouvez tous les posts scrapés mentionnant un terme, sans repasser par Excel")
+
+    # Charger les données des pays
+    with open('data.json', 'r', encoding='utf-8') as f:
+        countries_data = json.load(f)
+
+    store = PostStore()
+
+    # Filtres
+    with st.sidebar:
+        st.header("🎛 Filtres")
+
+        countries = st.multiselect(
+            "Pays",
+            options=list(countries_data.keys()),
+            help="Tous les pays si aucun n'est sélectionné"
+        )
+        urls = [
+            url
+            for country in (countries or countries_data)
+            for url in countries_data[country].values()
+        ]
+        page_ids = store.page_ids_for_urls(urls)
+        page_names = store.page_names(page_ids)
+
+        actors = st.multiselect(
+            "Acteurs",
+            options=sorted(set(page_names.values()) - {None}),
+            help="Tous les acteurs des pays sélectionnés si aucun n'est sélectionné"
+        )
+        if actors:
+            page_ids = [page_id for page_id, name in page_names.items() if name in actors]
+        elif not countries:
+            # Aucun filtre : tout le stockage local, y compris les pages scrapées par lien
+            page_ids = None
+
+        period = st.date_input(
+            "Période",
+            value=(date.today() - timedelta(days=90), date.today()),
+            format="DD/MM/YYYY"
+        )
+
+        order = st.radio("Trier par", ["pertinence", "date"], horizontal=True)
+        page_size = st.selectbox("Posts par page", PAGE_SIZES)
+
+        st.markdown("---")
+        st.markdown("### 📌 Syntaxe")
+        st.markdown("""
+        - `crédit immobilier` : posts contenant les deux mots (accents ignorés)
+        - `"taux zéro"` : expression exacte
+        - `financ*` : mots commençant par *financ*
+        """)
+
+    search = st.text_input("Rechercher", placeholder='crédit "taux zéro" financ*')
+    match = build_search_query(search) if search else None
+    if search and match is None:
+        st.warning("⚠️ La recherche ne contient que des mots vides")
+    if match is None:
+        return
+
+    # Période : jours locaux inclus
+    since_ts = until_ts = None
+    if len(period) == 2:
+        since_ts = int(datetime.combine(period[0], datetime.min.time()).timestamp())
+        until_ts = int(datetime.combine(period[1] + timedelta(days=1), datetime.min.time()).timestamp())
+
+    page = st.session_state.get('search_page', 1)
+    search_key = (match, page_ids if page_ids is None else tuple(page_ids), since_ts, until_ts, order, page_size)
+    if st.session_state.get('search_key') != search_key:
+        st.session_state['search_key'] = search_key
+        page = 1
+
+    start = time.perf_counter()
+    results, total = store.search_posts(
+        match, page_ids, since_ts, until_ts, order=order, limit=page_size, offset=(page - 1) * page_size
+    )
+    elapsed = time.perf_counter() - start
+
+    if total == 0:
+        st.info("Aucun post ne correspond à cette recherche")
+        return
+
+    n_pages = (total - 1) // page_size + 1
+    st.caption(
+        f"Posts {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(results)} sur {total} "
+        f"· {elapsed * 1000:.0f} ms"
+    )
+    st.dataframe(
+        results,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "URL du post": st.column_config.LinkColumn("URL du post"),
+            "Date de création": st.column_config.DateColumn("Date de création", format="DD/MM/YYYY")
+        }
+    )
+
+    # Pagination
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Précédente", disabled=page <= 1):
+            st.session_state['search_page'] = page - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Page {page} / {n_pages}")
+    with col3:
+        if st.button("Suivante ➡️", disabled=page >= n_pages):
+            st.session_state['search_page'] = page + 1
+            st.rerun()
+    st.session_state['search_page'] = page
+
+
+if __name__ == "__main__":
+    main()
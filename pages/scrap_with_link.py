@@ -1,101 +1,16 @@
 import streamlit as st
-from apify_client import ApifyClient
-import pandas as pd
-import json
-import time
-from datetime import datetime, timedelta
-import io
+from datetime import datetime
+from utils import scrape_facebook_simplified
+from exports import write_excel, write_csv, deferred_export
 
-def scrape_facebook_simplified(api_token: str, facebook_urls: list, days: int = 35):
-    """
-    Scrape uniquement les informations essentielles de Facebook.
-    
-    Args:
-        api_token (str): Token API Apify
-        facebook_urls (list): Liste des URLs Facebook
-        days (int): Nombre de jours à scraper
-    
-    Returns:
-        list: Liste de dictionnaires avec les données simplifiées
-    """
-    client = ApifyClient(api_token)
-    simplified_data = []
-    
-    try:
-        # 1. Récupérer les infos des pages
-        st.info("🔍 Récupération des informations des pages...")
-        page_info_actor_id = "Catqz8yCm9MEuNd8x"
-        page_info_input = {"urls": facebook_urls}
-        
-        run_page_info = client.actor(page_info_actor_id).call(run_input=page_info_input)
-        page_info_results = list(client.dataset(run_page_info["defaultDatasetId"]).iterate_items())
-        
-        # 2. Récupérer les posts pour chaque page
-        st.info("📝 Récupération des posts...")
-        posts_actor_id = "oj3ILOAxhstwhCRYo"
-        
-        # Calculer les timestamps
-        start_time_ts = int(time.time())
-        end_time_ts = start_time_ts - (days * 24 * 60 * 60)
-        
-        posts_input_list = []
-        for page_info in page_info_results:
-            posts_input_list.append({
-                "pageId": page_info.get("page_id"),
-                "maxPosts": 100,
-                "startTime": start_time_ts,
-                "endTime": end_time_ts
-            })
-        
-
-        if posts_input_list:
-            run_posts = client.actor(posts_actor_id).call(run_input={"input": posts_input_list})
-            posts_results = list(client.dataset(run_posts["defaultDatasetId"]).iterate_items())
-            
-            # Créer un mapping des page_id vers nom de page
-            page_id_to_name = {page['page_id']: page.get('name', 'N/A') for page in page_info_results}
-            
-            # Extraire uniquement les données demandées
-            for post in posts_results:
-                page_id = post.get("pageId")
-                page_name = page_id_to_name.get(page_id, "N/A")
-                
-                # Construire l'URL du post
-                post_id = post.get("postId", "")
-                post_url = f"https://www.facebook.com/{post_id}" if post_id else "N/A"
-                
-                # Convertir la date de création
-                creation_date = post.get("creationDate")
-                
-                if creation_date:
-                    try:
-                        # 1. Si creation_date est un timestamp (ex: "1699632397")
-                        if str(creation_date).isdigit():
-                            creation_date = datetime.fromtimestamp(int(creation_date)).strftime("%Y-%m-%d")
-                        else:
-                            # 2. Sinon, parser la date textuelle "Monday, November 10, 2025 at 01:56 PM" et enlever l'heure
-                            creation_date = datetime.strptime(
-                                creation_date,
-                                "%A, %B %d, %Y at %I:%M %p"
-                            ).strftime("%Y-%m-%d")
-
-                    except Exception as e:
-                        # Si tout échoue, conserver en texte brut
-                        creation_date = str(creation_date)
-                
-                simplified_data.append({
-                    "Nom de la page": page_name,
-                    "Texte du post": post.get("text", ""),
-                    "URL du post": post_url,
-                    "Date de création": creation_date
-                })
-        
-        st.success(f"✅ {len(simplified_data)} posts récupérés avec succès!")
-        return simplified_data
-        
-    except Exception as e:
-        st.error(f"❌ Erreur lors du scraping: {str(e)}")
-        return []
+def show_progress(message: str, level: str = "info"):
+    """Affiche la progression du scraping (les mises à jour fréquentes ne sont pas affichées)."""
+    if level == "success":
+        st.success(message)
+    elif level == "error":
+        st.error(message)
+    elif level == "info":
+        st.info(message)
 
 
 def main():
@@ -168,20 +83,20 @@ def main():
             st.warning("⚠️ Veuillez ajouter au moins une URL Facebook")
         else:
             with st.spinner("Scraping en cours... Cela peut prendre quelques minutes ⏳"):
-                data = scrape_facebook_simplified(api_token, facebook_urls, days)
+                df = scrape_facebook_simplified(api_token, facebook_urls, days, progress=show_progress)
                 
-                if data:
-                    # Stocker les données dans la session
-                    st.session_state['scraped_data'] = data
-                    st.session_state['scraping_done'] = True
+                if not df.empty:
+                    # Stocker les données dans la session (clés propres à cette page),
+                    # sans la colonne interne des groupes de doublons
+                    st.session_state['link_scraped_data'] = df.drop(columns="Groupe", errors="ignore")
+                    st.session_state['link_scraping_done'] = True
     
     # Affichage des résultats
-    if st.session_state.get('scraping_done', False) and 'scraped_data' in st.session_state:
+    if st.session_state.get('link_scraping_done', False) and 'link_scraped_data' in st.session_state:
         st.markdown("---")
         st.header("📊 Résultats")
         
-        data = st.session_state['scraped_data']
-        df = pd.DataFrame(data)
+        df = st.session_state['link_scraped_data']
         
         # Statistiques
         col1, col2, col3 = st.columns(3)
@@ -203,43 +118,35 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            # Export Excel
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Posts Facebook')
-                
-                # Ajuster la largeur des colonnes
-                worksheet = writer.sheets['Posts Facebook']
-                for idx, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).apply(len).max(),
-                        len(col)
-                    )
-                    worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
-            
-            excel_data = output.getvalue()
-            
+            # Export Excel, généré au clic
             st.download_button(
                 label="📥 Télécharger Excel",
-                data=excel_data,
+                data=deferred_export(
+                    lambda output: write_excel(df, output, 'Posts Facebook'),
+                    stage="export_excel", items=len(df)
+                ),
                 file_name=f"facebook_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore"
             )
         
         with col2:
-            # Export CSV
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
+            # Export CSV, généré au clic
             st.download_button(
                 label="📥 Télécharger CSV",
-                data=csv,
+                data=deferred_export(
+                    lambda output: write_csv([df], output),
+                    stage="export_csv", items=len(df)
+                ),
                 file_name=f"facebook_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"
             )
         
         # Option pour réinitialiser
         if st.button("🔄 Nouveau scraping"):
-            st.session_state['scraping_done'] = False
-            st.session_state.pop('scraped_data', None)
+            st.session_state['link_scraping_done'] = False
+            st.session_state.pop('link_scraped_data', None)
             st.rerun()
 
 
@@ -0,0 +1,910 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+
+# Base SQLite locale contenant les posts et les pages déjà scrapés
+DB_PATH = "veille.db"
+
+# Durée de validité des informations de pages (page_id, nom) : 7 jours
+PAGE_INFO_TTL = 7 * 24 * 60 * 60
+
+# Nombre maximal de paramètres par requête : les longues listes (empreintes,
+# buckets LSH, posts d'un lot de réindexation) sont découpées en lots de cette
+# taille, sous la limite de SQLite (999 avant la 3.32, 32 766 ensuite)
+SQL_MAX_VARIABLES = 900
+
+# Les dates sont stockées en timestamps Unix et affichées dans le fuseau local
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+# Colonnes des résultats de scraping
+POST_COLUMNS = ["Nom de la page", "Texte du post", "URL du post", "Date de création"]
+
+# Colonnes à faible cardinalité stockées en catégories (une valeur par page ou par pays)
+CATEGORY_COLUMNS = ["Nom de la page", "Pays", "Groupe", "Type"]
+
+
+class PostStore:
+    """
+    Stockage local des posts Facebook, indexé par (pageId, postId).
+
+    Chaque méthode ouvre sa propre connexion : le stockage peut donc être
+    partagé entre plusieurs sessions Streamlit sans verrou applicatif.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Bases créées avec la clé primaire (page_id, post_id) : le rowid implicite,
+            # auquel se référait l'index plein texte, peut être renuméroté par un VACUUM.
+            # La table est recréée avec une colonne id explicite (mêmes valeurs)
+            post_columns = {row[1] for row in conn.execute("PRAGMA table_info(posts)")}
+            migrate_ids = bool(post_columns) and "id" not in post_columns
+            has_search_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+            ).fetchone() is not None
+            # Migration interrompue par une version précédente (non transactionnelle) :
+            # les posts restés dans posts_old sont recopiés avec de nouveaux id
+            resume = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'posts_old'"
+            ).fetchone() is not None
+            schema = """
+                CREATE TABLE IF NOT EXISTS posts (
+                    id          INTEGER PRIMARY KEY,
+                    page_id     TEXT NOT NULL,
+                    post_id     TEXT NOT NULL,
+                    page_name   TEXT,
+                    text        TEXT,
+                    url         TEXT,
+                    created_ts  INTEGER,
+                    created_raw TEXT,
+                    fetched_at  INTEGER NOT NULL,
+                    UNIQUE (page_id, post_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_posts_page_created
+                    ON posts (page_id, created_ts);
+
+                CREATE TABLE IF NOT EXISTS term_counts (
+                    term    TEXT NOT NULL,
+                    page_id TEXT NOT NULL,
+                    day     TEXT NOT NULL,
+                    n       INTEGER NOT NULL,
+                    n_unique INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (term, page_id, day)
+                );
+                CREATE INDEX IF NOT EXISTS idx_term_counts_page_day
+                    ON term_counts (page_id, day);
+
+                CREATE TABLE IF NOT EXISTS tag_counts (
+                    kind    TEXT NOT NULL,
+                    tag     TEXT NOT NULL,
+                    page_id TEXT NOT NULL,
+                    day     TEXT NOT NULL,
+                    n       INTEGER NOT NULL,
+                    n_unique INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, tag, page_id, day)
+                );
+                CREATE INDEX IF NOT EXISTS idx_tag_counts_kind_page_day
+                    ON tag_counts (kind, page_id, day);
+
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id      TEXT PRIMARY KEY,
+                    request_key TEXT NOT NULL,
+                    params      TEXT NOT NULL,
+                    status      TEXT NOT NULL,
+                    message     TEXT,
+                    n_posts     INTEGER,
+                    created_at  INTEGER NOT NULL,
+                    updated_at  INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS pages (
+                    url        TEXT PRIMARY KEY,
+                    page_id    TEXT,
+                    name       TEXT,
+                    fetched_at INTEGER NOT NULL
+                );
+
+                -- Période [covered_since, covered_until] dont tous les posts de la page
+                -- ont été récupérés (scraping incrémental)
+                CREATE TABLE IF NOT EXISTS page_coverage (
+                    page_id       TEXT PRIMARY KEY,
+                    covered_since INTEGER NOT NULL,
+                    covered_until INTEGER NOT NULL
+                );
+
+                -- Groupes de posts au contenu identique ou quasi identique (voir dedup.py)
+                CREATE TABLE IF NOT EXISTS post_clusters (
+                    page_id      TEXT NOT NULL,
+                    post_id      TEXT NOT NULL,
+                    cluster_id   TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (page_id, post_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_post_clusters_hash
+                    ON post_clusters (content_hash);
+
+                CREATE TABLE IF NOT EXISTS clusters (
+                    cluster_id TEXT PRIMARY KEY,
+                    signature  BLOB NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    bucket     INTEGER NOT NULL,
+                    cluster_id TEXT NOT NULL,
+                    PRIMARY KEY (bucket, cluster_id)
+                );
+
+                -- Type, titre généré et sentiment de chaque post (classify.py),
+                -- calculés une seule fois par post
+                CREATE TABLE IF NOT EXISTS post_labels (
+                    page_id   TEXT NOT NULL,
+                    post_id   TEXT NOT NULL,
+                    type      TEXT,
+                    title     TEXT,
+                    sentiment REAL,
+                    PRIMARY KEY (page_id, post_id)
+                );
+
+                -- Recherche plein texte sur le texte des posts, sans accents
+                -- ("credit" trouve "crédit"), tenue à jour par des triggers. Les
+                -- lignes de l'index sont celles de posts.id, stable même après un VACUUM
+                CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                    text, content='posts', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+                    INSERT INTO posts_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+                    INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF text ON posts
+                WHEN old.text IS NOT new.text BEGIN
+                    INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                    INSERT INTO posts_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+            """
+            if migrate_ids:
+                # Renommage, nouveau schéma et copie dans une seule transaction :
+                # une migration interrompue laisse la base intacte
+                conn.executescript("""
+                    BEGIN;
+                    DROP TRIGGER IF EXISTS posts_fts_insert;
+                    DROP TRIGGER IF EXISTS posts_fts_delete;
+                    DROP TRIGGER IF EXISTS posts_fts_update;
+                    DROP TABLE IF EXISTS posts_fts;
+                    DROP INDEX IF EXISTS idx_posts_page_created;
+                    ALTER TABLE posts RENAME TO posts_old;
+                """ + schema + """
+                    INSERT INTO posts (id, page_id, post_id, page_name, text, url, created_ts, created_raw, fetched_at)
+                    SELECT rowid, page_id, post_id, page_name, text, url, created_ts, created_raw, fetched_at
+                    FROM posts_old ORDER BY rowid;
+                    DROP TABLE posts_old;
+                    COMMIT;
+                """)
+            else:
+                conn.executescript(schema)
+                if resume:
+                    conn.executescript("""
+                        BEGIN;
+                        INSERT OR IGNORE INTO posts (page_id, post_id, page_name, text, url, created_ts, created_raw, fetched_at)
+                        SELECT page_id, post_id, page_name, text, url, created_ts, created_raw, fetched_at
+                        FROM posts_old ORDER BY rowid;
+                        DROP TABLE posts_old;
+                        COMMIT;
+                    """)
+                elif not has_search_index:
+                    conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+
+            # Bases créées avant le regroupement des doublons : les occurrences
+            # existantes comptent comme uniques jusqu'au prochain `veille reindex`
+            for table in ("term_counts", "tag_counts"):
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if "n_unique" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN n_unique INTEGER NOT NULL DEFAULT 0")
+                    conn.execute(f"UPDATE {table} SET n_unique = n")
+
+    def save_pages(self, pages: list):
+        """
+        Enregistre les informations des pages (URL, page_id, nom).
+
+        Args:
+            pages (list): Liste de dictionnaires avec les clés url, page_id et name
+        """
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO pages (url, page_id, name, fetched_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    page_id = excluded.page_id,
+                    name = excluded.name,
+                    fetched_at = excluded.fetched_at
+                """,
+                [(p["url"], str(p["page_id"]), p.get("name"), now) for p in pages]
+            )
+
+    def cached_pages(self, urls: list, ttl: int = PAGE_INFO_TTL) -> dict:
+        """
+        Retourne les informations de pages encore valides pour une liste d'URLs.
+
+        Args:
+            urls (list): Liste des URLs Facebook
+            ttl (int): Durée de validité en secondes
+
+        Returns:
+            dict: URL -> dictionnaire avec les clés page_id et name
+        """
+        urls = list(urls)
+        if not urls:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT url, page_id, name FROM pages
+                WHERE url IN ({_placeholders(urls)}) AND fetched_at >= ?
+                """,
+                [*urls, int(time.time()) - ttl]
+            ).fetchall()
+        return {url: {"page_id": page_id, "name": name} for url, page_id, name in rows}
+
+    def page_names(self, page_ids: list) -> dict:
+        """Retourne le nom connu de chaque page (page_id -> nom)."""
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT page_id, name FROM pages WHERE page_id IN ({_placeholders(page_ids)})",
+                page_ids
+            ).fetchall()
+        return dict(rows)
+
+    def page_ids_for_urls(self, urls: list) -> list:
+        """Retourne les page_id connus pour une liste d'URLs."""
+        urls = list(urls)
+        if not urls:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT page_id FROM pages WHERE url IN ({_placeholders(urls)})",
+                urls
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def last_timestamps(self, page_ids: list) -> dict:
+        """
+        Retourne, pour chaque page, le timestamp du post le plus récent stocké.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+
+        Returns:
+            dict: page_id -> timestamp Unix du dernier post
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT page_id, MAX(created_ts) FROM posts
+                WHERE page_id IN ({_placeholders(page_ids)}) AND created_ts IS NOT NULL
+                GROUP BY page_id
+                """,
+                page_ids
+            ).fetchall()
+        return {page_id: ts for page_id, ts in rows}
+
+    def coverage(self, page_ids: list) -> dict:
+        """
+        Retourne la période déjà entièrement scrapée de chaque page.
+
+        Returns:
+            dict: page_id -> (covered_since, covered_until), timestamps Unix
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT page_id, covered_since, covered_until FROM page_coverage
+                WHERE page_id IN ({_placeholders(page_ids)})
+                """,
+                page_ids
+            ).fetchall()
+        return {page_id: (since, until) for page_id, since, until in rows}
+
+    def extend_coverage(self, ranges: list):
+        """
+        Ajoute des périodes scrapées avec succès à la couverture des pages.
+
+        Une période qui chevauche ou prolonge la couverture connue est fusionnée
+        avec elle ; sinon, la plus récente des deux est conservée.
+
+        Args:
+            ranges (list): Tuples (page_id, since_ts, until_ts)
+        """
+        with self._connect() as conn:
+            for page_id, since, until in ranges:
+                row = conn.execute(
+                    "SELECT covered_since, covered_until FROM page_coverage WHERE page_id = ?", (str(page_id),)
+                ).fetchone()
+                if row is not None:
+                    old_since, old_until = row
+                    if since <= old_until and until >= old_since:
+                        since, until = min(since, old_since), max(until, old_until)
+                    elif until < old_since:
+                        continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO page_coverage (page_id, covered_since, covered_until) VALUES (?, ?, ?)",
+                    (str(page_id), since, until)
+                )
+
+    def post_rates(self, page_ids: list, since_ts: int) -> dict:
+        """
+        Retourne, pour chaque page, le nombre moyen de posts stockés par jour.
+
+        La moyenne est calculée sur la période couverte par les posts stockés
+        depuis since_ts (au moins un jour), pour ne pas sous-estimer une page
+        dont l'historique est récent.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+            since_ts (int): Début de l'historique pris en compte (timestamp Unix)
+
+        Returns:
+            dict: page_id -> posts par jour (pages sans historique absentes)
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT page_id, COUNT(*), MIN(created_ts) FROM posts
+                WHERE page_id IN ({_placeholders(page_ids)}) AND created_ts >= ?
+                GROUP BY page_id
+                """,
+                page_ids + [since_ts]
+            ).fetchall()
+        now = time.time()
+        return {
+            page_id: n / max(1.0, (now - first_ts) / (24 * 60 * 60))
+            for page_id, n, first_ts in rows
+        }
+
+    def upsert_posts(self, posts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Insère ou met à jour des posts.
+
+        Args:
+            posts (pd.DataFrame): Posts normalisés avec les colonnes page_id, post_id,
+                page_name, text, url, created_ts et created_raw
+
+        Returns:
+            pd.DataFrame: Posts qui n'étaient pas encore stockés
+        """
+        if posts.empty:
+            return posts
+        now = int(time.time())
+        columns = ["page_name", "text", "url", "created_ts", "created_raw", "page_id", "post_id"]
+        rows = posts[columns].astype(object).where(posts[columns].notna(), None)
+        is_new = []
+        with self._connect() as conn:
+            for page_name, text, url, created_ts, created_raw, page_id, post_id in rows.itertuples(index=False):
+                row = (page_name, text, url, created_ts, created_raw, now, str(page_id), str(post_id))
+                updated = conn.execute(
+                    """
+                    UPDATE posts SET page_name = ?, text = ?, url = ?, created_ts = ?,
+                                     created_raw = ?, fetched_at = ?
+                    WHERE page_id = ? AND post_id = ?
+                    """,
+                    row
+                ).rowcount
+                if not updated:
+                    conn.execute(
+                        """
+                        INSERT INTO posts (page_name, text, url, created_ts, created_raw,
+                                           fetched_at, page_id, post_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        row
+                    )
+                is_new.append(not updated)
+        return posts[is_new]
+
+    def add_term_counts(self, counts: pd.DataFrame):
+        """
+        Ajoute des occurrences de mots à l'index de fréquences.
+
+        Args:
+            counts (pd.DataFrame): Colonnes term, page_id, day, n et n_unique
+        """
+        if counts.empty:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO term_counts (term, page_id, day, n, n_unique) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (term, page_id, day) DO UPDATE SET
+                    n = n + excluded.n,
+                    n_unique = n_unique + excluded.n_unique
+                """,
+                counts[["term", "page_id", "day", "n", "n_unique"]].itertuples(index=False, name=None)
+            )
+
+    def clear_indexes(self):
+        """Vide les index de fréquences des mots, hashtags et mentions, et les groupes de doublons."""
+        with self._connect() as conn:
+            for table in ("term_counts", "tag_counts", "post_clusters", "clusters", "lsh_buckets"):
+                conn.execute(f"DELETE FROM {table}")
+
+    def term_frequencies(self, page_ids: list, since_day: str = None, until_day: str = None,
+                         limit: int = 200, unique: bool = False) -> dict:
+        """
+        Retourne les mots les plus fréquents d'un ensemble de pages.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+            since_day (str): Premier jour inclus ("%Y-%m-%d"), sans borne si None
+            until_day (str): Dernier jour inclus ("%Y-%m-%d"), sans borne si None
+            limit (int): Nombre maximal de mots retournés
+            unique (bool): Ne compter qu'une fois les posts repris d'un même contenu
+
+        Returns:
+            dict: Mot -> nombre d'occurrences
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT term, SUM({_count_column(unique)}) AS total FROM term_counts
+                WHERE page_id IN ({_placeholders(page_ids)}) AND day >= ? AND day <= ?
+                GROUP BY term HAVING total > 0 ORDER BY total DESC LIMIT ?
+                """,
+                [*page_ids, since_day or "", until_day or "9999-12-31", limit]
+            ).fetchall()
+        return dict(rows)
+
+    def add_tag_counts(self, counts: pd.DataFrame):
+        """
+        Ajoute des occurrences de hashtags ou de mentions à l'index.
+
+        Args:
+            counts (pd.DataFrame): Colonnes kind ("hashtag" ou "mention"), tag, page_id, day, n et n_unique
+        """
+        if counts.empty:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO tag_counts (kind, tag, page_id, day, n, n_unique) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, tag, page_id, day) DO UPDATE SET
+                    n = n + excluded.n,
+                    n_unique = n_unique + excluded.n_unique
+                """,
+                counts[["kind", "tag", "page_id", "day", "n", "n_unique"]].itertuples(index=False, name=None)
+            )
+
+    def top_tags(self, page_ids: list, kind: str = "hashtag", since_day: str = None,
+                 until_day: str = None, limit: int = 10, unique: bool = False) -> pd.Series:
+        """
+        Retourne les hashtags (ou mentions) les plus utilisés par un ensemble de pages.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+            kind (str): "hashtag" ou "mention"
+            since_day (str): Premier jour inclus ("%Y-%m-%d"), sans borne si None
+            until_day (str): Dernier jour inclus ("%Y-%m-%d"), sans borne si None
+            limit (int): Nombre maximal de tags retournés
+            unique (bool): Ne compter qu'une fois les posts repris d'un même contenu
+
+        Returns:
+            pd.Series: Tag -> nombre d'occurrences, par ordre décroissant
+        """
+        rows = self._tag_query(
+            "SELECT tag, SUM({count}) AS n FROM tag_counts WHERE {where} GROUP BY tag HAVING n > 0 "
+            "ORDER BY n DESC LIMIT ?",
+            page_ids, kind, since_day, until_day, [limit], unique
+        )
+        return rows.set_index("tag")["n"].astype("int64")
+
+    def tag_trend(self, page_ids: list, tags: list, kind: str = "hashtag",
+                  since_day: str = None, until_day: str = None, unique: bool = False) -> pd.DataFrame:
+        """
+        Retourne l'évolution quotidienne de l'usage de quelques tags.
+
+        Returns:
+            pd.DataFrame: Une ligne par jour (index datetime64), une colonne par tag
+        """
+        tags = list(tags)
+        if not tags:
+            return pd.DataFrame()
+        rows = self._tag_query(
+            f"""
+            SELECT day, tag, SUM({{count}}) AS n FROM tag_counts
+            WHERE {{where}} AND day != '' AND tag IN ({_placeholders(tags)})
+            GROUP BY day, tag
+            """,
+            page_ids, kind, since_day, until_day, tags, unique
+        )
+        trend = rows.pivot(index="day", columns="tag", values="n").fillna(0)
+        trend.index = pd.to_datetime(trend.index)
+        return trend
+
+    def tags_by_page(self, page_ids: list, kind: str = "hashtag", since_day: str = None,
+                     until_day: str = None, unique: bool = False) -> pd.DataFrame:
+        """
+        Retourne le nombre d'occurrences de chaque tag par page.
+
+        Returns:
+            pd.DataFrame: Colonnes page_id, tag et n
+        """
+        return self._tag_query(
+            "SELECT page_id, tag, SUM({count}) AS n FROM tag_counts WHERE {where} GROUP BY page_id, tag "
+            "HAVING n > 0 ORDER BY n DESC",
+            page_ids, kind, since_day, until_day, unique=unique
+        )
+
+    def _tag_query(self, sql: str, page_ids: list, kind: str, since_day: str, until_day: str,
+                   extra_params: list = (), unique: bool = False) -> pd.DataFrame:
+        page_ids = [str(p) for p in page_ids]
+        where = f"kind = ? AND page_id IN ({_placeholders(page_ids)}) AND day >= ? AND day <= ?"
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                sql.format(where=where, count=_count_column(unique)),
+                conn,
+                params=[kind, *page_ids, since_day or "", until_day or "9999-12-31", *extra_params]
+            )
+
+    def rebuild_search_index(self):
+        """Reconstruit l'index plein texte à partir de la table des posts."""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+
+    def search_posts(self, match: str, page_ids: list = None, since_ts: int = None, until_ts: int = None,
+                     order: str = "pertinence", limit: int = 25, offset: int = 0) -> tuple:
+        """
+        Recherche des posts stockés par leur texte.
+
+        Args:
+            match (str): Requête FTS5 (voir utils.build_search_query)
+            page_ids (list): Pages à inclure (toutes si None)
+            since_ts (int): Début de la période (timestamp Unix inclus), sans borne si None
+            until_ts (int): Fin de la période (timestamp Unix exclu), sans borne si None
+            order (str): "pertinence" (BM25) ou "date" (plus récents d'abord)
+            limit (int): Nombre de posts par page de résultats
+            offset (int): Nombre de posts à sauter
+
+        Returns:
+            tuple: (DataFrame au format de load_posts pour la page demandée, nombre total de posts trouvés)
+        """
+        where, params = ["posts_fts MATCH ?"], [match]
+        if page_ids is not None:
+            page_ids = [str(p) for p in page_ids]
+            if not page_ids:
+                return pd.DataFrame(columns=POST_COLUMNS), 0
+            where.append(f"p.page_id IN ({_placeholders(page_ids)})")
+            params += page_ids
+        if since_ts is not None:
+            where.append("p.created_ts >= ?")
+            params.append(since_ts)
+        if until_ts is not None:
+            where.append("p.created_ts < ?")
+            params.append(until_ts)
+        query = f"FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid WHERE {' AND '.join(where)}"
+        order_by = "bm25(posts_fts)" if order == "pertinence" else "p.created_ts DESC"
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) {query}", params).fetchone()[0]
+            rows = pd.read_sql_query(
+                f"SELECT p.page_name, p.text, p.url, p.created_ts {query} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                conn,
+                params=[*params, limit, offset]
+            )
+        return pd.DataFrame({
+            "Nom de la page": rows["page_name"].fillna("N/A"),
+            "Texte du post": rows["text"].fillna(""),
+            "URL du post": rows["url"],
+            "Date de création": to_local_datetime(rows["created_ts"]).dt.normalize()
+        }), total
+
+    def clusters_by_hash(self, content_hashes: list) -> dict:
+        """Retourne le groupe de doublons déjà associé à chaque empreinte de contenu connue."""
+        content_hashes = list(set(content_hashes))
+        rows = []
+        with self._connect() as conn:
+            for batch in _batches(content_hashes):
+                rows += conn.execute(
+                    f"""
+                    SELECT content_hash, MIN(cluster_id) FROM post_clusters
+                    WHERE content_hash IN ({_placeholders(batch)})
+                    GROUP BY content_hash
+                    """,
+                    batch
+                ).fetchall()
+        return dict(rows)
+
+    def lsh_candidates(self, buckets: list) -> tuple:
+        """
+        Retourne les groupes de doublons présents dans des buckets LSH.
+
+        Returns:
+            tuple: (bucket -> liste de cluster_id, cluster_id -> signature MinHash brute)
+        """
+        buckets = list(set(buckets))
+        rows = []
+        with self._connect() as conn:
+            for batch in _batches(buckets):
+                rows += conn.execute(
+                    f"""
+                    SELECT b.bucket, b.cluster_id, c.signature FROM lsh_buckets b
+                    JOIN clusters c ON c.cluster_id = b.cluster_id
+                    WHERE b.bucket IN ({_placeholders(batch)})
+                    """,
+                    batch
+                ).fetchall()
+        by_bucket, signatures = {}, {}
+        for bucket, cluster_id, signature in rows:
+            by_bucket.setdefault(bucket, []).append(cluster_id)
+            signatures[cluster_id] = signature
+        return by_bucket, signatures
+
+    def save_clusters(self, assignments: list, clusters: list, buckets: list):
+        """
+        Enregistre les groupes de doublons d'un lot de posts.
+
+        Args:
+            assignments (list): Tuples (page_id, post_id, cluster_id, content_hash)
+            clusters (list): Nouveaux groupes, tuples (cluster_id, signature)
+            buckets (list): Buckets LSH des nouveaux groupes, tuples (bucket, cluster_id)
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO post_clusters (page_id, post_id, cluster_id, content_hash) VALUES (?, ?, ?, ?)",
+                assignments
+            )
+            conn.executemany("INSERT OR IGNORE INTO clusters (cluster_id, signature) VALUES (?, ?)", clusters)
+            conn.executemany("INSERT OR IGNORE INTO lsh_buckets (bucket, cluster_id) VALUES (?, ?)", buckets)
+
+    def labeled_posts(self, keys: list) -> set:
+        """Retourne les posts parmi ceux demandés (tuples (page_id, post_id)) qui sont déjà classés."""
+        keys = list(set(keys))
+        rows = []
+        with self._connect() as conn:
+            for batch in _batches(keys, SQL_MAX_VARIABLES // 2):
+                rows += conn.execute(
+                    f"""
+                    SELECT page_id, post_id FROM post_labels
+                    WHERE (page_id, post_id) IN (VALUES {", ".join(["(?, ?)"] * len(batch))})
+                    """,
+                    [value for key in batch for value in key]
+                ).fetchall()
+        return set(rows)
+
+    def save_labels(self, labels: list):
+        """
+        Enregistre les étiquettes d'un lot de posts.
+
+        Args:
+            labels (list): Tuples (page_id, post_id, type, title, sentiment)
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO post_labels (page_id, post_id, type, title, sentiment) VALUES (?, ?, ?, ?, ?)",
+                labels
+            )
+
+    def create_job(self, job_id: str, request_key: str, params: dict):
+        """Enregistre un nouveau travail de scraping en attente."""
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO jobs (job_id, request_key, params, status, created_at, updated_at)
+                VALUES (?, ?, ?, 'pending', ?, ?)
+                """,
+                (job_id, request_key, json.dumps(params, ensure_ascii=False), now, now)
+            )
+
+    def update_job(self, job_id: str, **fields):
+        """
+        Met à jour un travail de scraping.
+
+        Args:
+            job_id (str): Identifiant du travail
+            **fields: Colonnes à modifier (status, message, n_posts)
+        """
+        fields["updated_at"] = int(time.time())
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", [*fields.values(), job_id])
+
+    def get_job(self, job_id: str) -> dict:
+        """Retourne un travail de scraping, ou None s'il est inconnu."""
+        jobs = self._select_jobs("WHERE job_id = ?", [job_id])
+        return jobs[0] if jobs else None
+
+    def recent_jobs(self, limit: int = 10) -> list:
+        """Retourne les derniers travaux de scraping, du plus récent au plus ancien."""
+        return self._select_jobs("ORDER BY created_at DESC LIMIT ?", [limit])
+
+    def interrupt_jobs(self):
+        """Marque comme interrompus les travaux restés en cours (arrêt du serveur)."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'interrupted', updated_at = ? WHERE status IN ('pending', 'running')",
+                (int(time.time()),)
+            )
+
+    def _select_jobs(self, clause: str, params: list) -> list:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT * FROM jobs {clause}", params).fetchall()
+        return [{**dict(row), "params": json.loads(row["params"])} for row in rows]
+
+    def iter_posts(self, chunk_size: int = 10_000):
+        """
+        Parcourt tous les posts stockés par lots.
+
+        Yields:
+            pd.DataFrame: Lot de posts avec les colonnes page_id, post_id, page_name,
+                text, url, created_ts et created_raw
+        """
+        with self._connect() as conn:
+            yield from pd.read_sql_query(
+                """
+                SELECT page_id, post_id, page_name, text, url, created_ts, created_raw
+                FROM posts ORDER BY id
+                """,
+                conn,
+                chunksize=chunk_size
+            )
+
+    def load_posts(self, page_ids: list, since_ts: int) -> pd.DataFrame:
+        """
+        Charge les posts stockés d'un ensemble de pages depuis une date donnée.
+
+        Les posts dont la date n'a pas pu être interprétée sont conservés
+        (avec une date vide) s'ils ont été récupérés dans la fenêtre demandée.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+            since_ts (int): Timestamp Unix de début de la fenêtre
+
+        Returns:
+            pd.DataFrame: Posts au format de scrape_facebook_simplified
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return pd.DataFrame(columns=POST_COLUMNS)
+        with self._connect() as conn:
+            rows = pd.read_sql_query(_posts_query(page_ids), conn, params=[*page_ids, since_ts, since_ts])
+        return _posts_frame(rows)
+
+    def load_posts_chunks(self, page_ids: list, since_ts: int, chunk_size: int = 10_000):
+        """
+        Charge les posts stockés par lots, sans les charger tous en mémoire.
+
+        Même sélection et même format que load_posts, pour les exports
+        d'archives sur de longues périodes.
+
+        Args:
+            page_ids (list): Liste des identifiants de pages
+            since_ts (int): Timestamp Unix de début de la fenêtre
+            chunk_size (int): Nombre de posts par lot
+
+        Yields:
+            pd.DataFrame: Lots de posts au format de scrape_facebook_simplified
+        """
+        page_ids = [str(p) for p in page_ids]
+        if not page_ids:
+            return
+        with self._connect() as conn:
+            for rows in pd.read_sql_query(
+                _posts_query(page_ids), conn, params=[*page_ids, since_ts, since_ts], chunksize=chunk_size
+            ):
+                yield _posts_frame(rows)
+
+
+def _posts_query(page_ids: list) -> str:
+    """Requête des posts d'un ensemble de pages depuis une date (paramètres : page_ids, since_ts deux fois)."""
+    return f"""
+        SELECT p.page_name, p.text, p.url, p.created_ts,
+               COALESCE(c.cluster_id, p.page_id || ':' || p.post_id) AS cluster_id,
+               l.type, l.title, l.sentiment
+        FROM posts p
+        LEFT JOIN post_clusters c ON c.page_id = p.page_id AND c.post_id = p.post_id
+        LEFT JOIN post_labels l ON l.page_id = p.page_id AND l.post_id = p.post_id
+        WHERE p.page_id IN ({_placeholders(page_ids)})
+          AND (p.created_ts >= ? OR (p.created_ts IS NULL AND p.fetched_at >= ?))
+        ORDER BY p.created_ts DESC
+    """
+
+
+def _posts_frame(rows: pd.DataFrame) -> pd.DataFrame:
+    """Met les lignes de _posts_query au format de scrape_facebook_simplified."""
+    return compact_posts(pd.DataFrame({
+        "Nom de la page": rows["page_name"].fillna("N/A"),
+        "Texte du post": rows["text"].fillna(""),
+        "URL du post": rows["url"],
+        # Date du post sans l'heure
+        "Date de création": to_local_datetime(rows["created_ts"]).dt.normalize(),
+        # Groupe de doublons du post (voir collapse_duplicates)
+        "Groupe": rows["cluster_id"],
+        # Classification automatique (voir classify.py), vide pour les posts non classés
+        "Type": rows["type"].fillna(""),
+        "Titre": rows["title"].fillna(""),
+        "Sentiment": pd.to_numeric(rows["sentiment"]).astype("Float32")
+    }))
+
+
+def compact_posts(posts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les colonnes répétitives d'un DataFrame de posts en catégories.
+
+    À appeler après chaque concaténation : pandas repasse en texte les
+    catégories de DataFrames dont les modalités diffèrent.
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in posts.columns and not isinstance(posts[col].dtype, pd.CategoricalDtype):
+            posts[col] = posts[col].astype("category")
+    return posts
+
+
+def to_local_datetime(timestamps: pd.Series) -> pd.Series:
+    """Convertit des timestamps Unix en dates (datetime64) du fuseau local."""
+    timestamps = pd.to_numeric(timestamps, errors="coerce")
+    return pd.to_datetime(timestamps, unit="s", utc=True).dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
+
+
+def collapse_duplicates(posts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ne garde qu'un post par groupe de doublons (le plus récent).
+
+    Returns:
+        pd.DataFrame: Posts dédoublonnés, avec une colonne Reprises (taille du groupe)
+    """
+    if "Groupe" not in posts.columns:
+        return posts
+    sizes = posts.groupby("Groupe", observed=True)["Groupe"].transform("size")
+    collapsed = posts.assign(Reprises=sizes.astype("int32"))
+    return collapsed.loc[~posts["Groupe"].duplicated()].reset_index(drop=True)
+
+
+def _count_column(unique: bool) -> str:
+    """Colonne d'occurrences des index : toutes les occurrences ou une par groupe de doublons."""
+    return "n_unique" if unique else "n"
+
+
+def _placeholders(values: list) -> str:
+    return ", ".join("?" * len(values))
+
+
+def _batches(values: list, size: int = None):
+    """Découpe une liste de paramètres en lots d'au plus size valeurs (SQL_MAX_VARIABLES par défaut)."""
+    size = size or SQL_MAX_VARIABLES
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
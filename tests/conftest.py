@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import PostStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Stockage local vide, dans un répertoire de travail temporaire."""
+    monkeypatch.chdir(tmp_path)
+    return PostStore(str(tmp_path / "veille.db"))
@@ -0,0 +1,64 @@
+import utils
+from benchmarks.fake_apify import FakeApifyClientAsync
+from utils import (
+    build_search_query, estimate_max_posts, plan_post_chunks, scrape_facebook_simplified,
+    MIN_MAX_POSTS, MAX_MAX_POSTS, MAX_PAGES_PER_CHUNK, POSTS_ACTOR_ID
+)
+
+DAY = 24 * 60 * 60
+URLS = ["https://www.facebook.com/banque1", "https://www.facebook.com/banque2"]
+
+
+class RecordingApifyClient(FakeApifyClientAsync):
+    """Client local qui garde les entrées de chaque run de l'actor posts."""
+
+    post_inputs = []
+
+    def _start(self, actor_id: str, run_input: dict) -> dict:
+        if actor_id == POSTS_ACTOR_ID:
+            self.post_inputs.extend(run_input["input"])
+        return super()._start(actor_id, run_input)
+
+
+def scrape(store, monkeypatch, days: int) -> list:
+    """Scrape URLS en mode incrémental et retourne les entrées envoyées à l'actor posts."""
+    RecordingApifyClient.post_inputs = []
+    monkeypatch.setattr(utils, "ApifyClientAsync", lambda token: RecordingApifyClient(token, posts_per_page=10))
+    scrape_facebook_simplified("token", URLS, days, incremental=True, store=store, progress=lambda *_: None)
+    return RecordingApifyClient.post_inputs
+
+
+def test_longer_window_refetches_uncovered_days(store, monkeypatch):
+    first = scrape(store, monkeypatch, days=7)
+    assert [p["startTime"] - p["endTime"] for p in first] == [7 * DAY] * len(URLS)
+
+    # Les 23 jours plus anciens n'ont jamais été scrapés : toute la fenêtre est redemandée
+    second = scrape(store, monkeypatch, days=30)
+    assert [p["startTime"] - p["endTime"] for p in second] == [30 * DAY] * len(URLS)
+
+    # Fenêtre désormais couverte : seuls les posts récents sont redemandés
+    third = scrape(store, monkeypatch, days=30)
+    assert all(p["startTime"] - p["endTime"] < DAY for p in third)
+
+
+def test_estimate_max_posts_bounds():
+    assert estimate_max_posts(None, 0) == MIN_MAX_POSTS
+    assert estimate_max_posts(10, 7 * DAY) == 105
+    assert estimate_max_posts(1000, 365 * DAY) == MAX_MAX_POSTS
+
+
+def test_plan_post_chunks_balances_volume():
+    pages = [{"pageId": str(i), "maxPosts": n} for i, n in enumerate([400, 300, 200, 100, 50])]
+    chunks = plan_post_chunks(pages, posts_per_chunk=500)
+    assert sorted(p["pageId"] for chunk in chunks for p in chunk) == [str(i) for i in range(5)]
+    assert all(sum(p["maxPosts"] for p in chunk) <= 500 for chunk in chunks)
+    assert len(chunks) == 3
+
+    many = plan_post_chunks([{"pageId": str(i), "maxPosts": 1} for i in range(25)])
+    assert all(len(chunk) <= MAX_PAGES_PER_CHUNK for chunk in many)
+
+
+def test_build_search_query():
+    assert build_search_query('Crédit immo* "taux zéro"') == '"crédit" AND "immo"* AND "taux zéro"'
+    assert build_search_query("le crédit de la banque") == '"crédit" AND "banque"'
+    assert build_search_query("le la les") is None
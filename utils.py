@@ -1,122 +1,590 @@
-import streamlit as st
-from apify_client import ApifyClient
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import time
-from datetime import datetime
+import hashlib
+import json
+import math
 import re
+import unicodedata
+import pandas as pd
+from store import PostStore, PAGE_INFO_TTL, LOCAL_TZ, POST_COLUMNS, to_local_datetime, compact_posts
+from metrics import RunMetrics, run_stats
+from dedup import assign_clusters
+from classify import label_posts
 
 
-def scrape_facebook_simplified(api_token: str, facebook_urls: list, days: int = 7):
+logger = logging.getLogger(__name__)
+
+# Client Apify, importé au premier scraping : le module apify_client est
+# coûteux à charger et inutile pour relire le stockage ou exporter
+ApifyClientAsync = None
+
+# Niveaux de log des messages de progression
+PROGRESS_LEVELS = {
+    "info": logging.INFO,
+    "progress": logging.DEBUG,
+    "success": logging.INFO,
+    "error": logging.ERROR
+}
+
+# Actors Apify utilisés pour le scraping
+PAGE_INFO_ACTOR_ID = "Catqz8yCm9MEuNd8x"
+POSTS_ACTOR_ID = "oj3ILOAxhstwhCRYo"
+
+# Lecture des datasets : taille des pages et champs conservés pour chaque post
+DATASET_PAGE_SIZE = 1000
+POSTS_FIELDS = ["pageId", "postId", "text", "creationDate"]
+RUN_TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "TIMED-OUT", "ABORTED"}
+
+# Découpage du stage posts : volume attendu par run d'actor et pages par run au plus
+POSTS_PER_CHUNK = 500
+MAX_PAGES_PER_CHUNK = 10
+
+# Estimation de maxPosts : historique pris en compte, volume supposé d'une page
+# inconnue, marge de sécurité et bornes
+RATE_HISTORY_DAYS = 30
+DEFAULT_POSTS_PER_DAY = 5
+MAX_POSTS_MARGIN = 1.5
+MIN_MAX_POSTS = 10
+MAX_MAX_POSTS = 5000
+
+# Nouvelles tentatives d'un chunk en échec, avec un délai doublé à chaque fois
+CHUNK_RETRIES = 3
+RETRY_BACKOFF = 5
+
+# Sérialise l'enregistrement des posts reçus (upsert, doublons, index, classification),
+# exécuté hors de la boucle asyncio : une seule écriture SQLite à la fois, et les
+# groupes de doublons d'un lot voient ceux des lots précédents, tous scrapings confondus
+INGEST_LOCK = threading.Lock()
+
+# Format des dates textuelles de l'actor : "Monday, November 10, 2025 at 01:56 PM"
+CREATION_DATE_FORMAT = "%A, %B %d, %Y at %I:%M %p"
+
+
+def log_progress(message: str, level: str = "info"):
+    """
+    Rapporte la progression du scraping dans les logs (callback par défaut).
+
+    Args:
+        message (str): Message à afficher
+        level (str): "info", "progress" (mise à jour fréquente), "success" ou "error"
+    """
+    logger.log(PROGRESS_LEVELS.get(level, logging.INFO), message)
+
+
+def scrape_facebook_simplified(api_token: str, facebook_urls: list, days: int = 7,
+                               incremental: bool = True, store: PostStore = None,
+                               page_info_ttl: int = PAGE_INFO_TTL, refresh_pages: bool = False,
+                               progress=log_progress, metrics: RunMetrics = None):
     """
     Scrape uniquement les informations essentielles de Facebook.
+
+    Les posts récupérés sont enregistrés dans le stockage local. En mode
+    incrémental, seuls les posts plus récents que le dernier post stocké
+    pour chaque page sont demandés à l'actor. Les informations des pages
+    sont mises en cache : seules les URLs nouvelles ou expirées passent
+    par l'actor page-info.
     
     Args:
         api_token (str): Token API Apify
         facebook_urls (list): Liste des URLs Facebook
         days (int): Nombre de jours à scraper
+        incremental (bool): Ne récupérer que les nouveaux posts de chaque page
+        store (PostStore): Stockage local des posts (base par défaut si None)
+        page_info_ttl (int): Durée de validité du cache des pages, en secondes
+        refresh_pages (bool): Ignorer le cache et interroger l'actor pour toutes les pages
+        progress (callable): Fonction appelée avec (message, niveau) pour suivre le scraping
+        metrics (RunMetrics): Collecte des mesures par étape (durées, volumes, coûts Apify)
     
     Returns:
-        list: Liste de dictionnaires avec les données simplifiées
+        pd.DataFrame: Posts avec les colonnes POST_COLUMNS
+    """
+    results = scrape_countries(
+        api_token, {None: facebook_urls}, days,
+        incremental=incremental, store=store,
+        page_info_ttl=page_info_ttl, refresh_pages=refresh_pages, progress=progress, metrics=metrics
+    )
+    return results[None]
+
+
+def scrape_countries(api_token: str, countries: dict, days: int = 7, max_concurrency: int = 4,
+                     chunk_size: int = None, incremental: bool = True, store: PostStore = None,
+                     page_info_ttl: int = PAGE_INFO_TTL, refresh_pages: bool = False,
+                     progress=log_progress, metrics: RunMetrics = None):
+    """
+    Scrape plusieurs pays en parallèle (voir scrape_countries_async).
+
+    Returns:
+        dict: Pays -> DataFrame des posts (avec une colonne Pays)
+    """
+    return asyncio.run(scrape_countries_async(
+        api_token, countries, days, max_concurrency=max_concurrency, chunk_size=chunk_size,
+        incremental=incremental, store=store,
+        page_info_ttl=page_info_ttl, refresh_pages=refresh_pages, progress=progress, metrics=metrics
+    ))
+
+
+async def scrape_countries_async(api_token: str, countries: dict, days: int = 7, max_concurrency: int = 4,
+                                 chunk_size: int = None, incremental: bool = True, store: PostStore = None,
+                                 page_info_ttl: int = PAGE_INFO_TTL, refresh_pages: bool = False,
+                                 progress=log_progress, metrics: RunMetrics = None):
+    """
+    Lance les runs des actors de tous les pays en même temps.
+
+    Chaque pays (ou chaque groupe de chunk_size pages) est scrapé par une
+    tâche asynchrone indépendante ; le nombre de runs Apify simultanés est
+    limité par max_concurrency. Les résultats sont fusionnés au fur et à
+    mesure que les tâches se terminent.
+
+    Args:
+        api_token (str): Token API Apify
+        countries (dict): Pays -> liste des URLs Facebook
+        days (int): Nombre de jours à scraper
+        max_concurrency (int): Nombre maximal de runs d'actors simultanés
+        chunk_size (int): Nombre de pages par tâche (toutes les pages du pays si None)
+        incremental (bool): Ne récupérer que les nouveaux posts de chaque page
+        store (PostStore): Stockage local des posts (base par défaut si None)
+        page_info_ttl (int): Durée de validité du cache des pages, en secondes
+        refresh_pages (bool): Ignorer le cache et interroger l'actor pour toutes les pages
+        progress (callable): Fonction appelée avec (message, niveau) pour suivre le scraping
+        metrics (RunMetrics): Collecte des mesures par étape (durées, volumes, coûts Apify)
+
+    Returns:
+        dict: Pays -> DataFrame des posts (avec une colonne Pays)
+    """
+    client = _apify_client(api_token)
+    store = store or PostStore()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    metrics = metrics or RunMetrics()
+
+    async def scrape_group(country, urls):
+        data = await _scrape_pages_async(
+            client, semaphore, store, urls, days, incremental,
+            page_info_ttl, refresh_pages, progress, metrics, label=country
+        )
+        return country, data
+
+    tasks = []
+    for country, urls in countries.items():
+        urls = list(urls)
+        size = chunk_size or len(urls) or 1
+        for i in range(0, len(urls), size):
+            tasks.append(scrape_group(country, urls[i:i + size]))
+
+    frames = {country: [] for country in countries}
+    for task in asyncio.as_completed(tasks):
+        country, data = await task
+        if country is not None:
+            data["Pays"] = country
+        frames[country].append(data)
+    return {
+        country: compact_posts(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame(columns=POST_COLUMNS)
+        for country, parts in frames.items()
+    }
+
+
+def _apify_client(api_token: str):
+    """Crée le client Apify asynchrone, en important apify_client à la première utilisation."""
+    global ApifyClientAsync
+    if ApifyClientAsync is None:
+        from apify_client import ApifyClientAsync
+    return ApifyClientAsync(api_token)
+
+
+async def _iter_actor_pages(client, semaphore, actor_id: str, run_input: dict, fields: list = None,
+                            page_size: int = DATASET_PAGE_SIZE, poll_interval: int = 5, stats: dict = None):
+    """
+    Lance un actor et lit son dataset page par page pendant l'exécution du run.
+
+    Les éléments sont transmis dès qu'ils sont écrits dans le dataset, sans
+    attendre la fin du run ni charger tout le dataset en mémoire.
+
+    Args:
+        actor_id (str): Identifiant de l'actor Apify
+        run_input (dict): Entrée du run
+        fields (list): Champs à conserver pour chaque élément (tous si None)
+        page_size (int): Nombre d'éléments lus par requête
+        poll_interval (int): Attente maximale, en secondes, entre deux lectures du dataset
+        stats (dict): Complété avec la durée du run, le nombre d'éléments,
+            l'identifiant, le statut et le coût du run
+
+    Yields:
+        list: Page d'éléments du dataset
     """
-    client = ApifyClient(api_token)
-    simplified_data = []
+    stats = {} if stats is None else stats
+    async with semaphore:
+        start = time.perf_counter()
+        stats.update(items=0)
+        run = await client.actor(actor_id).start(run_input=run_input)
+        dataset = client.dataset(run["defaultDatasetId"])
+        run_client = client.run(run["id"])
+        offset = 0
+        finished = False
+
+        while True:
+            page = await dataset.list_items(offset=offset, limit=page_size, fields=fields)
+            if page.items:
+                offset += len(page.items)
+                stats["items"] += len(page.items)
+                yield page.items
+            elif finished:
+                break
+            else:
+                run = await run_client.wait_for_finish(wait_secs=poll_interval) or run
+                finished = run["status"] in RUN_TERMINAL_STATUSES
+
+        stats.update(run_stats(run), seconds=time.perf_counter() - start)
+        if run["status"] != "SUCCEEDED":
+            raise RuntimeError(f"Le run {run['id']} de l'actor {actor_id} s'est terminé avec le statut {run['status']}")
+
+
+async def _scrape_pages_async(client, semaphore, store: PostStore, facebook_urls: list, days: int,
+                              incremental: bool, page_info_ttl: int, refresh_pages: bool, progress,
+                              metrics: RunMetrics, label: str = None):
+    """Récupère les pages puis les posts d'un groupe d'URLs et les enregistre dans le stockage."""
+    prefix = f"{label} : " if label else ""
     
     try:
         # 1. Récupérer les infos des pages
-        st.info("🔍 Récupération des informations des pages...")
-        page_info_actor_id = "Catqz8yCm9MEuNd8x"
+        progress(f"🔍 {prefix}Récupération des informations des pages...", "info")
         facebook_urls = list(facebook_urls)
-        page_info_input = {"urls": facebook_urls}
-        
-        run_page_info = client.actor(page_info_actor_id).call(run_input=page_info_input)
-        page_info_results = list(client.dataset(run_page_info["defaultDatasetId"]).iterate_items())
+        with metrics.stage("page_info_cache", label) as stage:
+            cached_pages = {} if refresh_pages else store.cached_pages(facebook_urls, page_info_ttl)
+            stage["items"] = len(cached_pages)
+        page_info_results = list(cached_pages.values())
+        missing_urls = [url for url in facebook_urls if url not in cached_pages]
+
+        if missing_urls:
+            page_info_input = {"urls": missing_urls}
+            stats = {}
+            fetched_pages = [
+                page_info
+                async for items in _iter_actor_pages(
+                    client, semaphore, PAGE_INFO_ACTOR_ID, page_info_input, stats=stats
+                )
+                for page_info in items
+            ]
+            metrics.add({"stage": "page_info_actor", "label": label, "pages": len(missing_urls), **stats})
+            store.save_pages(_match_page_urls(missing_urls, fetched_pages))
+            page_info_results += fetched_pages
         
         # 2. Récupérer les posts pour chaque page
-        st.info("📝 Récupération des posts...")
-        posts_actor_id = "oj3ILOAxhstwhCRYo"
+        progress(f"📝 {prefix}Récupération des posts...", "info")
         
         # Calculer les timestamps
         start_time_ts = int(time.time())
         end_time_ts = start_time_ts - (days * 24 * 60 * 60)
+
+        # En mode incrémental, repartir du dernier post stocké de chaque page, mais
+        # seulement si la période déjà scrapée couvre le début de la fenêtre : sinon
+        # (fenêtre plus longue qu'auparavant, page jamais scrapée), toute la fenêtre
+        # est redemandée
+        page_ids = [page_info.get("page_id") for page_info in page_info_results]
+        last_seen = store.last_timestamps(page_ids) if incremental else {}
+        coverage = store.coverage(page_ids) if incremental else {}
+        rates = store.post_rates(page_ids, start_time_ts - RATE_HISTORY_DAYS * 24 * 60 * 60)
         
         posts_input_list = []
         for page_info in page_info_results:
+            page_id = page_info.get("page_id")
+            covered_since, covered_until = coverage.get(str(page_id), (None, None))
+            page_end_ts = end_time_ts
+            if covered_since is not None and covered_since <= end_time_ts:
+                page_end_ts = max(end_time_ts, min(last_seen.get(str(page_id), covered_until), covered_until))
             posts_input_list.append({
-                "pageId": page_info.get("page_id"),
-                "maxPosts": 100,
+                "pageId": page_id,
+                "maxPosts": estimate_max_posts(rates.get(str(page_id)), start_time_ts - page_end_ts),
                 "startTime": start_time_ts,
-                "endTime": end_time_ts
+                "endTime": page_end_ts
             })
         
 
+        new_posts = 0
         if posts_input_list:
-            run_posts = client.actor(posts_actor_id).call(run_input={"input": posts_input_list})
-            posts_results = list(client.dataset(run_posts["defaultDatasetId"]).iterate_items())
-            
             # Créer un mapping des page_id vers nom de page
-            page_id_to_name = {page['page_id']: page.get('name', 'N/A') for page in page_info_results}
-            
-            # Extraire uniquement les données demandées
-            for post in posts_results:
-                page_id = post.get("pageId")
-                page_name = page_id_to_name.get(page_id, "N/A")
-                
-                # Construire l'URL du post
-                post_id = post.get("postId", "")
-                post_url = f"https://www.facebook.com/{post_id}" if post_id else "N/A"
-                
-                # Convertir la date de création
-                creation_date = post.get("creationDate")
-                
-                if creation_date:
-                    try:
-                        # 1. Si creation_date est un timestamp (ex: "1699632397")
-                        if str(creation_date).isdigit():
-                            creation_date = datetime.fromtimestamp(int(creation_date)).strftime("%Y-%m-%d")
-                        else:
-                            # 2. Sinon, parser la date textuelle "Monday, November 10, 2025 at 01:56 PM" et enlever l'heure
-                            creation_date = datetime.strptime(
-                                creation_date,
-                                "%A, %B %d, %Y at %I:%M %p"
-                            ).strftime("%Y-%m-%d")
-
-                    except Exception as e:
-                        # Si tout échoue, conserver en texte brut
-                        creation_date = str(creation_date)
-                
-                simplified_data.append({
-                    "Nom de la page": page_name,
-                    "Texte du post": post.get("text", ""),
-                    "URL du post": post_url,
-                    "Date de création": creation_date
-                })
+            page_id_to_name = {str(page['page_id']): page.get('name', 'N/A') for page in page_info_results}
+            chunks = plan_post_chunks(posts_input_list)
+            progress(f"📦 {prefix}{len(posts_input_list)} pages réparties en {len(chunks)} runs", "info")
+
+            # Enregistrer chaque page du dataset dès sa réception
+            received = 0
+            # Posts reçus et plus ancien post reçu par page, pour la couverture
+            page_counts, page_oldest = {}, {}
+
+            def ingest(items, stats):
+                nonlocal new_posts, received
+                # Volume JSON reçu, estimé hors de la boucle d'événements
+                stats["bytes"] = stats.get("bytes", 0) + len(json.dumps(items, ensure_ascii=False).encode())
+                with INGEST_LOCK:
+                    start = time.perf_counter()
+                    posts = normalize_posts(items, page_id_to_name)
+                    for page_id, n in posts["page_id"].astype(str).value_counts().items():
+                        page_counts[page_id] = page_counts.get(page_id, 0) + n
+                    oldest = posts.groupby(posts["page_id"].astype(str))["created_ts"].min().dropna()
+                    for page_id, ts in oldest.items():
+                        page_oldest[page_id] = min(page_oldest.get(page_id, ts), ts)
+                    normalized = time.perf_counter()
+                    new_posts_frame = store.upsert_posts(posts)
+                    stored = time.perf_counter()
+                    index_posts(store, new_posts_frame)
+                    metrics.accumulate("normalisation", label, normalized - start, items=len(items))
+                    metrics.accumulate("stockage", label, stored - normalized, items=len(new_posts_frame))
+                    metrics.accumulate("indexation", label, time.perf_counter() - stored, items=len(new_posts_frame))
+                    new_posts += len(new_posts_frame)
+                    received += len(items)
+
+            async def on_items(items, stats):
+                # Le traitement d'une page du dataset ne bloque pas le suivi des autres runs
+                await asyncio.to_thread(ingest, items, stats)
+                progress(f"📥 {prefix}{received} posts reçus ({new_posts} nouveaux)...", "progress")
+
+            failures = await asyncio.gather(*[
+                _scrape_posts_chunk(client, semaphore, chunk, on_items, progress, metrics, label)
+                for chunk in chunks
+            ])
+            # Couverture des pages des runs réussis : jusqu'au début de la période demandée,
+            # ou seulement jusqu'au plus ancien post reçu si maxPosts a été atteint
+            store.extend_coverage([
+                (
+                    page_input["pageId"],
+                    int(page_oldest.get(str(page_input["pageId"]), page_input["endTime"]))
+                    if page_counts.get(str(page_input["pageId"]), 0) >= page_input["maxPosts"]
+                    else page_input["endTime"],
+                    page_input["startTime"]
+                )
+                for chunk, error in zip(chunks, failures) if error is None
+                for page_input in chunk
+            ])
+            failures = [error for error in failures if error is not None]
+            if failures:
+                progress(
+                    f"❌ {prefix}{len(failures)} run(s) sur {len(chunks)} en échec après "
+                    f"{CHUNK_RETRIES} tentatives : {failures[0]}", "error"
+                )
+        
+        # 3. Relire la fenêtre complète depuis le stockage local
+        with metrics.stage("load_posts", label) as stage:
+            simplified_data = store.load_posts(page_ids, end_time_ts)
+            stage["items"] = len(simplified_data)
         
-        st.success(f"✅ {len(simplified_data)} posts récupérés avec succès!")
+        progress(f"✅ {prefix}{len(simplified_data)} posts récupérés avec succès ({new_posts} nouveaux)!", "success")
         return simplified_data
         
     except Exception as e:
-        st.error(f"❌ Erreur lors du scraping: {str(e)}")
-        return []
+        progress(f"❌ {prefix}Erreur lors du scraping: {str(e)}", "error")
+        return pd.DataFrame(columns=POST_COLUMNS)
 
 
+async def _scrape_posts_chunk(client, semaphore, chunk: list, on_items, progress, metrics: RunMetrics,
+                             label: str = None):
+    """
+    Exécute le run de l'actor posts d'un chunk de pages, en le relançant en cas d'échec.
 
+    Les posts déjà reçus lors d'une tentative échouée restent enregistrés :
+    l'upsert du stockage rend la relance idempotente. Chaque tentative est
+    mesurée (étape posts_actor), traitement des posts reçus compris.
+    on_items est une coroutine appelée avec chaque page du dataset et les
+    mesures de la tentative, qu'elle complète avec le volume reçu (bytes).
+
+    Returns:
+        str: Dernière erreur si toutes les tentatives ont échoué, sinon None
+    """
+    prefix = f"{label} : " if label else ""
+    delay = RETRY_BACKOFF
+    for attempt in range(1, CHUNK_RETRIES + 1):
+        stats = {}
+        try:
+            async for items in _iter_actor_pages(
+                client, semaphore, POSTS_ACTOR_ID, {"input": chunk}, fields=POSTS_FIELDS, stats=stats
+            ):
+                await on_items(items, stats)
+            return None
+        except Exception as e:
+            stats["error"] = str(e)
+            if attempt == CHUNK_RETRIES:
+                return str(e)
+            progress(
+                f"🔁 {prefix}Run de {len(chunk)} pages en échec ({e}), nouvelle tentative dans {delay} s...",
+                "info"
+            )
+            await asyncio.sleep(delay)
+            delay *= 2
+        finally:
+            metrics.add({"stage": "posts_actor", "label": label, "pages": len(chunk), "attempts": attempt, **stats})
+
+
+def estimate_max_posts(posts_per_day: float, window_seconds: int) -> int:
+    """
+    Estime le nombre de posts à demander pour une page sur une fenêtre.
+
+    Args:
+        posts_per_day (float): Volume historique de la page (None si inconnu)
+        window_seconds (int): Durée de la fenêtre demandée, en secondes
+
+    Returns:
+        int: Valeur de maxPosts, bornée entre MIN_MAX_POSTS et MAX_MAX_POSTS
+    """
+    if posts_per_day is None:
+        posts_per_day = DEFAULT_POSTS_PER_DAY
+    expected = posts_per_day * max(window_seconds, 0) / (24 * 60 * 60)
+    return int(min(max(math.ceil(expected * MAX_POSTS_MARGIN), MIN_MAX_POSTS), MAX_MAX_POSTS))
+
+
+def plan_post_chunks(posts_input_list: list, posts_per_chunk: int = POSTS_PER_CHUNK,
+                     max_pages: int = MAX_PAGES_PER_CHUNK) -> list:
+    """
+    Répartit les pages en chunks de volume attendu comparable.
+
+    Les pages sont placées de la plus volumineuse à la moins volumineuse
+    dans le chunk le moins chargé qui peut encore les accueillir : une page
+    très active occupe un chunk à elle seule et ne retarde pas les autres.
+
+    Args:
+        posts_input_list (list): Entrées de l'actor posts (avec maxPosts)
+        posts_per_chunk (int): Volume attendu maximal d'un chunk
+        max_pages (int): Nombre maximal de pages par chunk
+
+    Returns:
+        list: Liste de chunks (listes d'entrées de l'actor posts)
+    """
+    chunks = []
+    for page_input in sorted(posts_input_list, key=lambda p: p["maxPosts"], reverse=True):
+        candidates = [
+            chunk for chunk in chunks
+            if len(chunk["pages"]) < max_pages and chunk["volume"] + page_input["maxPosts"] <= posts_per_chunk
+        ]
+        if candidates:
+            chunk = min(candidates, key=lambda c: c["volume"])
+        else:
+            chunk = {"pages": [], "volume": 0}
+            chunks.append(chunk)
+        chunk["pages"].append(page_input)
+        chunk["volume"] += page_input["maxPosts"]
+    return [chunk["pages"] for chunk in chunks]
 
-# Fonction pour nettoyer les caractères illégaux pour Excel
-def clean_excel_text(text):
-    if isinstance(text, str):
-        # Supprime tous les caractères ASCII de contrôle sauf tabulation (9), newline (10), carriage return (13)
-        return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', text)
-    return text
+
+def normalize_posts(posts: list, page_id_to_name: dict) -> pd.DataFrame:
+    """
+    Normalise un lot de posts bruts de l'actor en une seule passe vectorisée.
+
+    Les noms de pages, les URLs et les deux formats de date (timestamp ou
+    texte "Monday, November 10, 2025 at 01:56 PM") sont résolus colonne par
+    colonne ; chaque date n'est interprétée qu'une seule fois.
+
+    Args:
+        posts (list): Posts bruts de l'actor (champs POSTS_FIELDS)
+        page_id_to_name (dict): page_id -> nom de la page
+
+    Returns:
+        pd.DataFrame: Posts avec les colonnes page_id, post_id, page_name, text,
+            url, created_ts et created_raw
+    """
+    raw = pd.DataFrame(posts, columns=POSTS_FIELDS)
+    page_id = raw["pageId"].astype(str)
+    text = raw["text"].fillna("").astype(str)
+    post_id = raw["postId"].fillna("").astype(str)
+    creation_date = raw["creationDate"].astype("string")
+
+    # 1. Dates sous forme de timestamp (ex: "1699632397")
+    is_timestamp = creation_date.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    timestamps = pd.to_numeric(creation_date.where(is_timestamp), errors="coerce")
+
+    # 2. Dates textuelles, interprétées dans le fuseau local
+    parsed = pd.to_datetime(creation_date.where(~is_timestamp), format=CREATION_DATE_FORMAT, errors="coerce")
+    parsed_ts = (parsed.dt.tz_localize(LOCAL_TZ) - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+
+    # Sans postId, la clé est dérivée du contenu du post
+    missing_id = post_id == ""
+    if missing_id.any():
+        post_id = post_id.mask(missing_id, pd.Series(
+            [
+                hashlib.sha1(f"{t}|{c}".encode()).hexdigest()
+                for t, c in zip(text[missing_id], raw["creationDate"][missing_id])
+            ],
+            index=post_id.index[missing_id]
+        ))
+
+    return pd.DataFrame({
+        "page_id": page_id,
+        "post_id": post_id,
+        "page_name": page_id.map(page_id_to_name).fillna("N/A"),
+        "text": text,
+        "url": ("https://www.facebook.com/" + raw["postId"].fillna("").astype(str)).where(~missing_id, "N/A"),
+        "created_ts": timestamps.fillna(parsed_ts).astype("Int64"),
+        "created_raw": creation_date
+    })
+
+
+def _match_page_urls(facebook_urls: list, page_info_results: list) -> list:
+    """
+    Associe chaque résultat de l'actor page-info à l'URL demandée.
+
+    Returns:
+        list: Liste de dictionnaires avec les clés url, page_id et name
+    """
+    def normalize(url):
+        return str(url).strip().rstrip("/").lower()
+
+    urls_by_key = {normalize(url): url for url in facebook_urls}
+    matched = []
+    for page_info in page_info_results:
+        if page_info.get("page_id") is None:
+            continue
+        for key in ("facebookUrl", "pageUrl", "url", "inputUrl"):
+            url = urls_by_key.get(normalize(page_info.get(key, "")))
+            if url:
+                matched.append({"url": url, "page_id": page_info["page_id"], "name": page_info.get("name")})
+                break
+
+    # À défaut d'URL dans les résultats, l'actor conserve l'ordre des URLs demandées
+    if not matched and len(page_info_results) == len(facebook_urls):
+        matched = [
+            {"url": url, "page_id": page_info["page_id"], "name": page_info.get("name")}
+            for url, page_info in zip(facebook_urls, page_info_results)
+            if page_info.get("page_id") is not None
+        ]
+    return matched
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Calcule une empreinte du contenu d'un DataFrame.
+
+    Sert de clé de cache pour les artefacts dérivés des résultats.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha1(hashes.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()
 
 
 # Liste des mots vides français (stopwords)
-FRENCH_STOPWORDS = [
+FRENCH_STOPWORDS = frozenset([
     "le", "la", "les", "un", "une", "des", "du", "de", "et", "en", "au",
     "aux", "pour", "dans", "sur", "avec", "par", "ce", "cet", "cette", "ces",
     "il", "elle", "ils", "elles", "nous", "vous", "ne", "pas", "que", "qui", "à", "notre", "vos",
     "mais", "ou", "donc", "or", "ni", "car", "si", "tous", "tout", "toute", "toutes",
     "son", "sa", "ses", "leur", "leurs", "mon", "ma", "mes", "ton", "ta", "tes",
-    "y", "en", "ceci", "cela", "ça", "ici", "votre", "est", "été", "être", "sont", "été", "faire"
-]
+    "y", "ceci", "cela", "ça", "ici", "votre", "est", "été", "être", "sont", "faire"
+])
+
+# Hashtags et ponctuation, supprimés en une seule passe
+CLEAN_PATTERN = re.compile(r'#\w+|[^\w\s]')
+
+# Termes d'une recherche : expressions entre guillemets ou mots (suivis de * pour un préfixe)
+SEARCH_TERM_PATTERN = re.compile(r'"([^"]+)"|(\w+)(\*?)')
+
+# Hashtags et mentions indexés à l'ingestion
+TAG_PATTERNS = {
+    "hashtag": re.compile(r'#\w+'),
+    # Pas de @ précédé d'un mot ou d'un point : adresses e-mail exclues (info@banque.com)
+    "mention": re.compile(r'(?<![\w.])@\w+')
+}
+
+
+# Taille de corpus à partir de laquelle clean_texts répartit le travail sur plusieurs processus
+PARALLEL_MIN_TEXTS = 100_000
+CLEAN_CHUNK_SIZE = 2_000
 
 
 def clean_text(text):
@@ -132,10 +600,193 @@ def clean_text(text):
     Returns:
         str: Texte nettoyé
     """
+    return " ".join(_clean_words(text))
+
+
+def _clean_words(text) -> list:
+    """Retourne les mots nettoyés d'un texte, en une seule passe."""
     if isinstance(text, str):
-        text = re.sub(r'#\w+', '', text)      # enlever hashtags
-        text = re.sub(r'[^\w\s]', '', text)   # enlever ponctuation
-        words = text.lower().split()
-        words = [w for w in words if w not in FRENCH_STOPWORDS]
-        return " ".join(words)
-    return ""
\ No newline at end of file
+        words = CLEAN_PATTERN.sub('', text).lower().split()
+        return [w for w in words if w not in FRENCH_STOPWORDS]
+    return []
+
+
+def clean_texts(texts: pd.Series, processes: int = None) -> pd.Series:
+    """
+    Nettoie toute une colonne de textes (voir clean_text).
+
+    Au-delà de PARALLEL_MIN_TEXTS textes, le nettoyage est réparti par lots
+    sur un pool de processus.
+
+    Args:
+        texts (pd.Series): Textes à nettoyer
+        processes (int): Nombre de processus (1 pour désactiver le pool)
+
+    Returns:
+        pd.Series: Textes nettoyés, avec le même index
+    """
+    if processes != 1 and len(texts) >= PARALLEL_MIN_TEXTS:
+        with ProcessPoolExecutor(processes) as pool:
+            cleaned = list(pool.map(clean_text, texts, chunksize=CLEAN_CHUNK_SIZE))
+    else:
+        cleaned = [clean_text(text) for text in texts]
+    return pd.Series(cleaned, index=texts.index, dtype=object)
+
+
+def tokenize_texts(texts: pd.Series) -> pd.Series:
+    """
+    Découpe une colonne de textes en mots nettoyés (voir clean_text).
+
+    Returns:
+        pd.Series: Un mot par ligne, indexé par la ligne du texte d'origine
+    """
+    words = pd.Series([_clean_words(text) for text in texts], index=texts.index, dtype=object)
+    return words.explode().dropna()
+
+
+def build_search_query(query: str) -> str:
+    """
+    Traduit une recherche saisie en requête FTS5 pour PostStore.search_posts.
+
+    Tous les termes sont requis ; les mots vides (FRENCH_STOPWORDS) sont
+    ignorés hors des expressions entre guillemets.
+    Exemple : 'crédit immo* "taux zéro"' -> '"crédit" AND "immo"* AND "taux zéro"'
+
+    Returns:
+        str: Requête FTS5, ou None si la recherche ne contient aucun terme utile
+    """
+    terms = []
+    for phrase, word, prefix in SEARCH_TERM_PATTERN.findall(query.casefold()):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word not in FRENCH_STOPWORDS:
+            terms.append(f'"{word}"{prefix}')
+    return " AND ".join(terms) or None
+
+
+def term_counts(posts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compte les mots nettoyés des posts, par page et par jour.
+
+    Sert à alimenter l'index de fréquences du stockage au fil de l'ingestion.
+
+    Args:
+        posts (pd.DataFrame): Posts normalisés (colonnes page_id, text et created_ts,
+            et duplicate pour les reprises d'un contenu déjà vu)
+
+    Returns:
+        pd.DataFrame: Colonnes term, page_id, day ("%Y-%m-%d", vide si inconnu), n
+            et n_unique (occurrences hors reprises)
+    """
+    tokens = tokenize_texts(posts["text"])
+    if tokens.empty:
+        return pd.DataFrame(columns=["term", "page_id", "day", "n", "n_unique"])
+    page_ids, days, unique = _post_keys(posts)
+    return _count_occurrences(pd.DataFrame({
+        "term": tokens.values,
+        "page_id": page_ids.loc[tokens.index].values,
+        "day": days.loc[tokens.index].values,
+        "unique": unique.loc[tokens.index].values
+    }))
+
+
+def normalize_tag(tag: str) -> str:
+    """Normalise un hashtag ou une mention : minuscules et sans accents ("#Crédit" -> "credit")."""
+    tag = unicodedata.normalize("NFKD", tag.lstrip("#@").casefold())
+    return "".join(c for c in tag if not unicodedata.combining(c))
+
+
+def tag_counts(posts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compte les hashtags et les mentions des posts, par page et par jour.
+
+    Args:
+        posts (pd.DataFrame): Posts normalisés (colonnes page_id, text et created_ts,
+            et duplicate pour les reprises d'un contenu déjà vu)
+
+    Returns:
+        pd.DataFrame: Colonnes kind ("hashtag" ou "mention"), tag normalisé, page_id, day,
+            n et n_unique (occurrences hors reprises)
+    """
+    page_ids, days, unique = _post_keys(posts)
+    texts = posts["text"].fillna("").astype(str)
+    frames = []
+    for kind, pattern in TAG_PATTERNS.items():
+        tags = texts.str.findall(pattern).explode().dropna()
+        if tags.empty:
+            continue
+        normalized = {tag: normalize_tag(tag) for tag in tags.unique()}
+        frames.append(pd.DataFrame({
+            "kind": kind,
+            "tag": tags.map(normalized).values,
+            "page_id": page_ids.loc[tags.index].values,
+            "day": days.loc[tags.index].values,
+            "unique": unique.loc[tags.index].values
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["kind", "tag", "page_id", "day", "n", "n_unique"])
+    return _count_occurrences(pd.concat(frames, ignore_index=True))
+
+
+def _post_keys(posts: pd.DataFrame):
+    """Retourne la page, le jour ("%Y-%m-%d", vide si inconnu) et le caractère unique (hors reprise) de chaque post."""
+    page_ids = posts["page_id"].astype(str)
+    days = to_local_datetime(posts["created_ts"]).dt.strftime("%Y-%m-%d").fillna("")
+    unique = ~posts["duplicate"] if "duplicate" in posts.columns else pd.Series(True, index=posts.index)
+    return page_ids, days, unique
+
+
+def _count_occurrences(occurrences: pd.DataFrame) -> pd.DataFrame:
+    """Compte les occurrences par clé (toutes les colonnes sauf unique) : n et n_unique."""
+    keys = [col for col in occurrences.columns if col != "unique"]
+    counts = occurrences.groupby(keys, sort=False)["unique"].agg(["size", "sum"])
+    return counts.set_axis(["n", "n_unique"], axis=1).astype("int64").reset_index()
+
+
+def index_posts(store: PostStore, posts: pd.DataFrame):
+    """
+    Ajoute des posts nouvellement stockés aux groupes de doublons et aux index
+    de mots, hashtags et mentions, et classe ceux qui ne l'ont pas encore été.
+    """
+    posts = posts.assign(duplicate=assign_clusters(store, posts))
+    store.add_term_counts(term_counts(posts))
+    store.add_tag_counts(tag_counts(posts))
+    label_posts(store, posts)
+
+
+def rebuild_indexes(store: PostStore):
+    """
+    Reconstruit les index de mots, hashtags, mentions, doublons et recherche à partir de tous les posts stockés.
+
+    Les étiquettes de classification sont conservées ; seuls les posts encore
+    non classés (stockés avant la classification) le sont.
+    """
+    store.clear_indexes()
+    for posts in store.iter_posts():
+        index_posts(store, posts)
+    store.rebuild_search_index()
+
+
+def iter_country_posts(store: PostStore, countries: dict, days: int, chunk_size: int = 10_000):
+    """
+    Parcourt par lots les posts stockés de plusieurs pays, pour les exports d'archives.
+
+    Args:
+        store (PostStore): Stockage local des posts
+        countries (dict): Pays -> liste des URLs Facebook (clé None pour des pages sans pays)
+        days (int): Nombre de jours en arrière
+        chunk_size (int): Nombre de posts par lot
+
+    Yields:
+        pd.DataFrame: Lots de posts au format de scrape_countries (colonne Pays, sans Groupe)
+    """
+    since_ts = int(time.time()) - days * 24 * 60 * 60
+    for country, urls in countries.items():
+        page_ids = store.page_ids_for_urls(urls)
+        for posts in store.load_posts_chunks(page_ids, since_ts, chunk_size):
+            posts = posts.drop(columns="Groupe")
+            if country is not None:
+                posts["Pays"] = country
+            yield posts
@@ -0,0 +1,213 @@
+"""
+Point d'entrée en ligne de commande de la veille, sans Streamlit.
+
+Exemples :
+    python -m veille scrape --country Cameroun --days 7
+    python -m veille scrape --all-countries --days 90 --export veille.xlsx
+    python -m veille export --all-countries --days 365 --output archive.parquet
+    python -m veille reindex
+
+Le token Apify est lu dans la variable d'environnement APIFY_TOKEN (ou
+--token). Les posts sont enregistrés dans le stockage local, que l'interface
+Streamlit peut ensuite relire sans relancer les actors ; la commande peut
+donc être planifiée avec cron en heures creuses.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import pandas as pd
+from store import PostStore, DB_PATH, compact_posts, collapse_duplicates
+from utils import scrape_countries, rebuild_indexes, iter_country_posts, PROGRESS_LEVELS
+from exports import archive_format, write_archive, parquet_available, ARCHIVE_FORMATS
+from metrics import RunMetrics, METRICS_LOG_PATH
+
+
+# Fichier des pays et pages suivis, à côté de ce module
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.json")
+
+logger = logging.getLogger("veille")
+
+
+def load_countries(path: str = DATA_PATH) -> dict:
+    """
+    Charge les pays et pages suivis.
+
+    Returns:
+        dict: Pays -> {nom de la page: URL Facebook}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _country_key(name: str) -> str:
+    """Clé de comparaison d'un nom de pays : minuscules, sans drapeau ni espaces superflus."""
+    return "".join(c for c in name.casefold() if c.isalnum() or c.isspace()).strip()
+
+
+def resolve_countries(countries_data: dict, names: list) -> dict:
+    """
+    Sélectionne des pays par leur nom, sans tenir compte de la casse ni des drapeaux.
+
+    Returns:
+        dict: Pays -> liste des URLs Facebook
+
+    Raises:
+        ValueError: Si un pays est inconnu
+    """
+    by_key = {_country_key(country): country for country in countries_data}
+    selected = {}
+    for name in names:
+        country = by_key.get(_country_key(name))
+        if country is None:
+            raise ValueError(f"Pays inconnu : {name} (disponibles : {', '.join(countries_data)})")
+        selected[country] = list(countries_data[country].values())
+    return selected
+
+
+def export_posts(df: pd.DataFrame, path: str):
+    """Exporte les posts en Excel (.xlsx), CSV (.csv, .csv.gz) ou Parquet (.parquet) selon l'extension du fichier."""
+    if path.lower().endswith(".xlsx"):
+        from exports import write_excel
+        write_excel(df, path)
+    else:
+        write_archive([df], path, archive_format(path) or "csv")
+
+
+def cmd_scrape(args) -> int:
+    token = args.token or os.environ.get("APIFY_TOKEN")
+    if not token:
+        logger.error("Token Apify manquant : utilisez --token ou la variable APIFY_TOKEN")
+        return 2
+
+    countries_data = load_countries(args.data)
+    try:
+        countries = (
+            resolve_countries(countries_data, list(countries_data))
+            if args.all_countries else resolve_countries(countries_data, args.country)
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+
+    errors = []
+
+    def progress(message: str, level: str = "info"):
+        if level == "error":
+            errors.append(message)
+        logger.log(PROGRESS_LEVELS.get(level, logging.INFO), message)
+
+    metrics = RunMetrics()
+    try:
+        results = scrape_countries(
+            token, countries, args.days,
+            max_concurrency=args.concurrency, chunk_size=args.chunk_size,
+            incremental=not args.full, store=PostStore(args.db),
+            refresh_pages=args.refresh_pages, progress=progress, metrics=metrics
+        )
+        df = compact_posts(pd.concat(results.values(), ignore_index=True))
+        logger.info("%d posts dans la fenêtre de %d jours", len(df), args.days)
+
+        if args.export:
+            if args.collapse_duplicates:
+                df = collapse_duplicates(df)
+            with metrics.stage("export", items=len(df)):
+                export_posts(df.drop(columns="Groupe", errors="ignore"), args.export)
+            logger.info("Export écrit dans %s", args.export)
+    finally:
+        metrics.write(args.metrics_log)
+    logger.debug("Mesures par étape :\n%s", metrics.to_frame().to_string(index=False))
+
+    return 1 if errors else 0
+
+
+def cmd_export(args) -> int:
+    fmt = archive_format(args.output)
+    if fmt is None:
+        logger.error("Format d'archive non pris en charge : %s (extensions : %s)",
+                     args.output, ", ".join("." + f for f in ARCHIVE_FORMATS))
+        return 2
+    if fmt == "parquet" and not parquet_available():
+        logger.error("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+        return 2
+
+    countries_data = load_countries(args.data)
+    try:
+        countries = (
+            resolve_countries(countries_data, list(countries_data))
+            if args.all_countries else resolve_countries(countries_data, args.country)
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+
+    # Les posts sont lus et écrits par lots : la mémoire ne dépend pas de la période exportée
+    n_posts = 0
+
+    def counted(chunks):
+        nonlocal n_posts
+        for chunk in chunks:
+            n_posts += len(chunk)
+            yield chunk
+
+    write_archive(counted(iter_country_posts(PostStore(args.db), countries, args.days)), args.output, fmt)
+    logger.info("%d posts exportés dans %s", n_posts, args.output)
+    return 0
+
+
+def cmd_reindex(args) -> int:
+    rebuild_indexes(PostStore(args.db))
+    logger.info("Index des mots, hashtags, mentions, doublons et recherche reconstruits")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="veille", description="Veille Finance CEMAC Facebook")
+    parser.add_argument("--db", default=DB_PATH, help="Base SQLite du stockage local")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Affiche la progression détaillée")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape = subparsers.add_parser("scrape", help="Scrape les pages d'un ou plusieurs pays")
+    target = scrape.add_mutually_exclusive_group(required=True)
+    target.add_argument("--country", action="append", help="Pays à scraper (option répétable)")
+    target.add_argument("--all-countries", action="store_true", help="Scrape tous les pays de data.json")
+    scrape.add_argument("--days", type=int, default=7, help="Nombre de jours à scraper")
+    scrape.add_argument("--full", action="store_true", help="Désactive le scraping incrémental")
+    scrape.add_argument("--refresh-pages", action="store_true", help="Ignore le cache des informations de pages")
+    scrape.add_argument("--concurrency", type=int, default=4, help="Nombre maximal de runs Apify simultanés")
+    scrape.add_argument("--chunk-size", type=int, default=None, help="Nombre de pages par run d'actor")
+    scrape.add_argument("--export", help="Fichier d'export (.xlsx, .csv, .csv.gz ou .parquet)")
+    scrape.add_argument("--collapse-duplicates", action="store_true",
+                        help="N'exporte qu'un post par groupe de reprises (colonne Reprises)")
+    scrape.add_argument("--token", help="Token API Apify (par défaut : APIFY_TOKEN)")
+    scrape.add_argument("--data", default=DATA_PATH, help="Fichier JSON des pays et pages suivis")
+    scrape.add_argument("--metrics-log", default=METRICS_LOG_PATH,
+                        help="Journal JSON-lines des mesures par étape (durées, volumes, coûts Apify)")
+    scrape.set_defaults(func=cmd_scrape)
+
+    export = subparsers.add_parser("export", help="Exporte les posts stockés, par lots, sans relancer les actors")
+    target = export.add_mutually_exclusive_group(required=True)
+    target.add_argument("--country", action="append", help="Pays à exporter (option répétable)")
+    target.add_argument("--all-countries", action="store_true", help="Exporte tous les pays de data.json")
+    export.add_argument("--days", type=int, default=30, help="Nombre de jours à exporter")
+    export.add_argument("--output", required=True, help="Fichier d'archive (.csv, .csv.gz ou .parquet)")
+    export.add_argument("--data", default=DATA_PATH, help="Fichier JSON des pays et pages suivis")
+    export.set_defaults(func=cmd_export)
+
+    reindex = subparsers.add_parser("reindex", help="Reconstruit les index d'analyse à partir des posts stockés")
+    reindex.set_defaults(func=cmd_reindex)
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())